@@ -1,45 +1,82 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_pymongo import PyMongo
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
-import jwt
-from datetime import datetime, timedelta
+from datetime import datetime
 import subprocess
 import threading
 import os
 import json
+import socket
+import time
+import uuid
 from functools import wraps
+import auth
+import calibration
+import model_registry
+import monitoring
+from session_store import SESSION_TTL, create_session_store
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'
 app.config['MONGO_URI'] = 'mongodb://localhost:27017/spineguard'
+app.config['SERIAL_PORT'] = os.environ.get('SPINEGUARD_SERIAL_PORT', 'COM3')
+# 'local' for a single worker, 'mongo' when running behind several gunicorn workers.
+# Calibration progress streams hold a worker thread while open, so use threaded
+# (-k gthread) or gevent (-k gevent) workers rather than the default sync ones, e.g.
+#   SPINEGUARD_SESSION_STORE=mongo gunicorn -w 4 -k gthread --threads 16 --pythonpath backend -b 0.0.0.0:5000 app:app
+app.config['SESSION_STORE'] = os.environ.get('SPINEGUARD_SESSION_STORE', 'local')
 
 mongo = PyMongo(app)
 CORS(app)
 
-# Global variables for monitoring state
+# Monitoring and calibration session state (owner, progress) shared by all workers
+session_store = create_session_store(app.config['SESSION_STORE'], mongo.db)
+MONITORING_SESSION = 'monitoring'
+MONITORING_REFRESH_INTERVAL = 1  # Seconds between the owner's session refreshes
+MONITORING_STOP_TIMEOUT = 3  # Seconds to wait for another worker to stop its session
+CALIBRATION_REFRESH_INTERVAL = 1  # Seconds between the owner's calibration session refreshes
+CALIBRATION_POLL_INTERVAL = 0.5  # Seconds between store reads while streaming progress
+CALIBRATION_KEEPALIVE_INTERVAL = 15  # Seconds of silence before a stream sends a keep-alive
+
+# Prediction process of the monitoring session this worker owns
 monitoring_state = {
-    'active': False,
-    'user_id': None,
-    'process': None,
-    'current_posture': 'good'
+    'owner': None,
+    'process': None
 }
+monitoring_lock = threading.Lock()
+
+# serial_reader.py processes of the calibration sessions this worker runs, by session id
+calibration_processes = {}
+
+def session_owner():
+    """Owner token for a session this worker starts"""
+    # Unique per session, so threads left over from a session that was stopped
+    # and restarted cannot write into its replacement
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+        try:
+            current_user_id = auth.decode_token(request.headers.get('Authorization'), app.config['SECRET_KEY'])
+        except auth.AuthError as e:
+            return jsonify({'error': str(e)}), 401
         
+        return f(current_user_id, *args, **kwargs)
+    return decorated
+
+def stream_token_required(f):
+    """token_required for EventSource streams, which pass a session's stream token in the URL"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
         try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user_id = data['user_id']
-        except:
-            return jsonify({'error': 'Token is invalid'}), 401
+            current_user_id = auth.decode_stream_token(
+                request.args.get('stream_token'), kwargs.get('session_id'), app.config['SECRET_KEY']
+            )
+        except auth.AuthError as e:
+            return jsonify({'error': str(e)}), 401
         
         return f(current_user_id, *args, **kwargs)
     return decorated
@@ -48,12 +85,10 @@ def token_required(f):
 def register():
     try:
         data = request.get_json()
-        username = data.get('username')
-        password = data.get('password')
-        email = data.get('email', '')
-        
-        if not username or not password:
-            return jsonify({'error': 'Username and password are required'}), 400
+        try:
+            username, password = auth.parse_credentials(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Check if user already exists
         if mongo.db.users.find_one({'username': username}):
@@ -61,28 +96,13 @@ def register():
         
         # Create new user
         hashed_password = generate_password_hash(password)
-        user_data = {
-            'username': username,
-            'password': hashed_password,
-            'email': email,
-            'created_at': datetime.utcnow(),
-            'settings': {
-                'voice_alerts': True,
-                'sound_type': 'voice',
-                'alert_threshold': 10,
-                'volume': 80,
-                'notifications': True
-            }
-        }
+        user_data = auth.new_user_document(username, hashed_password, data.get('email', ''))
         
         result = mongo.db.users.insert_one(user_data)
         user_id = str(result.inserted_id)
         
         # Generate token
-        token = jwt.encode({
-            'user_id': user_id,
-            'exp': datetime.utcnow() + timedelta(days=30)
-        }, app.config['SECRET_KEY'])
+        token = auth.issue_token(user_id, app.config['SECRET_KEY'])
         
         return jsonify({
             'message': 'User created successfully',
@@ -97,12 +117,10 @@ def register():
 @app.route('/api/login', methods=['POST'])
 def login():
     try:
-        data = request.get_json()
-        username = data.get('username')
-        password = data.get('password')
-        
-        if not username or not password:
-            return jsonify({'error': 'Username and password are required'}), 400
+        try:
+            username, password = auth.parse_credentials(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Find user
         user = mongo.db.users.find_one({'username': username})
@@ -110,10 +128,7 @@ def login():
             return jsonify({'error': 'Invalid username or password'}), 401
         
         # Generate token
-        token = jwt.encode({
-            'user_id': str(user['_id']),
-            'exp': datetime.utcnow() + timedelta(days=30)
-        }, app.config['SECRET_KEY'])
+        token = auth.issue_token(str(user['_id']), app.config['SECRET_KEY'])
         
         return jsonify({
             'message': 'Login successful',
@@ -160,35 +175,118 @@ def update_user_settings(current_user_id, user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _calibration_key(session_id):
+    return f"calibration:{session_id}"
+
+def _calibration_user_key(user_id):
+    # Held while a user's calibration runs, so each user runs at most one
+    return f"calibration_user:{user_id}"
+
+def _update_calibration_session(session, owner, ttl=SESSION_TTL, **fields):
+    """Apply a progress update and publish it to the shared store for every worker"""
+    session.update(fields)
+    session['version'] += 1
+    session_store.update(_calibration_key(session['session_id']), owner, calibration.snapshot(session), ttl)
+
+def _watch_calibration_session(session, owner, process, done):
+    """Keep the owned session alive and stop serial_reader.py when any worker cancels it"""
+    while not done.wait(CALIBRATION_REFRESH_INTERVAL):
+        stored = session_store.update(_calibration_key(session['session_id']), owner)
+        session_store.update(_calibration_user_key(session['user_id']), owner)
+        if not stored or stored.get('stop_requested'):
+            if process.poll() is None:
+                process.terminate()
+            break
+
+def _run_calibration(session, owner):
+    """Run serial_reader.py for a session and relay its JSON progress lines"""
+    key = _calibration_key(session['session_id'])
+    done = threading.Event()
+    watch_thread = None
+    try:
+        process = subprocess.Popen(
+            ['python', *calibration.reader_argv(session, app.config['SERIAL_PORT'])],
+            cwd='backend', stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        calibration_processes[session['session_id']] = process
+        
+        watch_thread = threading.Thread(target=_watch_calibration_session, args=(session, owner, process, done))
+        watch_thread.daemon = True
+        watch_thread.start()
+        
+        for line in iter(process.stdout.readline, ''):
+            event = calibration.parse_event(line)
+            if event:
+                _update_calibration_session(session, owner, **calibration.progress_update(session, event))
+        
+        returncode = process.wait()
+        stderr = process.stderr.read()
+        
+        stored = session_store.get(key)
+        if stored and stored.get('stop_requested'):
+            session['status'] = 'cancelling'
+        
+        outcome = calibration.outcome_update(session, returncode, stderr)
+        if outcome:
+            _update_calibration_session(session, owner, **outcome)
+        else:
+            # Save calibration data to database
+            mongo.db.calibrations.insert_one(calibration.calibration_record(session))
+            _update_calibration_session(session, owner, **calibration.completed_update(session))
+    
+    except Exception as e:
+        _update_calibration_session(session, owner, status='failed', error=str(e))
+    finally:
+        done.set()
+        if watch_thread:
+            watch_thread.join()
+        calibration_processes.pop(session['session_id'], None)
+        # Finished sessions stay queryable for a while after the owner stops refreshing them
+        _update_calibration_session(
+            session, owner, ttl=calibration.CALIBRATION_SESSION_TTL, finished_at=time.time()
+        )
+        session_store.release(_calibration_user_key(session['user_id']), owner)
+
+def _start_calibration(current_user_id, posture):
+    """Start a background calibration session and return its initial state"""
+    data = request.get_json(silent=True) or {}
+    try:
+        samples = calibration.parse_samples(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    session = calibration.new_session(current_user_id, posture, samples)
+    owner = session_owner()
+    if not session_store.claim(_calibration_user_key(current_user_id), owner, {'session_id': session['session_id']}):
+        running = session_store.get(_calibration_user_key(current_user_id))
+        running_session = running and session_store.get(_calibration_key(running['session_id']))
+        return jsonify({
+            'error': 'A calibration is already running',
+            'session': running_session and calibration.snapshot(running_session)
+        }), 409
+    
+    session_store.claim(_calibration_key(session['session_id']), owner, calibration.snapshot(session))
+    
+    calibration_thread = threading.Thread(target=_run_calibration, args=(session, owner))
+    calibration_thread.daemon = True
+    calibration_thread.start()
+    
+    return jsonify(calibration.snapshot(session)), 202
+
+def _get_owned_session(current_user_id, session_id):
+    """Look up a calibration session in the shared store, returning (session, error_response)"""
+    session = session_store.get(_calibration_key(session_id))
+    if not session:
+        return None, (jsonify({'error': 'Calibration session not found'}), 404)
+    if session['user_id'] != current_user_id:
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
+    return calibration.snapshot(session), None
+
 @app.route('/api/calibrate/good', methods=['POST'])
 @token_required
 def calibrate_good_posture(current_user_id):
     try:
-        data = request.get_json()
-        samples = data.get('samples', 200)
-        
-        # Run serial_reader.py for good posture calibration
-        result = subprocess.run([
-            'python', 'scripts/serial_reader.py', 
-            '--mode', 'calibrate_good',
-            '--samples', str(samples),
-            '--user_id', current_user_id
-        ], capture_output=True, text=True, cwd='backend')
-        
-        if result.returncode != 0:
-            return jsonify({'error': f'Calibration failed: {result.stderr}'}), 500
-        
-        # Save calibration data to database
-        calibration_data = {
-            'user_id': current_user_id,
-            'type': 'good_posture',
-            'samples': samples,
-            'timestamp': datetime.utcnow(),
-            'data_file': f'data/good_posture_{current_user_id}.csv'
-        }
-        mongo.db.calibrations.insert_one(calibration_data)
-        
-        return jsonify({'message': 'Good posture calibration completed successfully'}), 200
+        return _start_calibration(current_user_id, 'good')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -197,86 +295,230 @@ def calibrate_good_posture(current_user_id):
 @token_required
 def calibrate_bad_posture(current_user_id):
     try:
-        data = request.get_json()
-        samples = data.get('samples', 200)
+        return _start_calibration(current_user_id, 'bad')
         
-        # Run serial_reader.py for bad posture calibration
-        result = subprocess.run([
-            'python', 'scripts/serial_reader.py', 
-            '--mode', 'calibrate_bad',
-            '--samples', str(samples),
-            '--user_id', current_user_id
-        ], capture_output=True, text=True, cwd='backend')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/sessions/<session_id>', methods=['GET'])
+@token_required
+def get_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
         
-        if result.returncode != 0:
-            return jsonify({'error': f'Calibration failed: {result.stderr}'}), 500
+        # Lets the client open the progress stream without putting its API token in a URL
+        stream_token = auth.issue_stream_token(current_user_id, session_id, app.config['SECRET_KEY'])
+        return jsonify(dict(session, stream_token=stream_token)), 200
         
-        # Save calibration data to database
-        calibration_data = {
-            'user_id': current_user_id,
-            'type': 'bad_posture',
-            'samples': samples,
-            'timestamp': datetime.utcnow(),
-            'data_file': f'data/bad_posture_{current_user_id}.csv'
-        }
-        mongo.db.calibrations.insert_one(calibration_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/sessions/<session_id>/stream', methods=['GET'])
+@stream_token_required
+def stream_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
+        
+        # Progress may be written by another worker, so the stream polls the shared store.
+        # Each open stream holds a worker thread; see the gunicorn note at the top
+        def generate():
+            last_state = None
+            last_sent = time.time()
+            while True:
+                stored = session_store.get(_calibration_key(session_id))
+                if not stored:
+                    break
+                
+                snapshot = calibration.snapshot(stored)
+                state = (snapshot['version'], snapshot['status'])
+                if state != last_state:
+                    last_state = state
+                    last_sent = time.time()
+                    yield f"data: {json.dumps(snapshot)}\n\n"
+                    if snapshot['finished_at']:
+                        break
+                elif time.time() - last_sent >= CALIBRATION_KEEPALIVE_INTERVAL:
+                    # Idle streams still get a keep-alive
+                    last_sent = time.time()
+                    yield ': keep-alive\n\n'
+                
+                time.sleep(CALIBRATION_POLL_INTERVAL)
         
-        return jsonify({'message': 'Bad posture calibration completed successfully'}), 200
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/calibrate/sessions/<session_id>/cancel', methods=['POST'])
+@token_required
+def cancel_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
+        if session['finished_at']:
+            return jsonify({'error': 'Calibration session is not running'}), 400
+        
+        # The worker running the session stops serial_reader.py on its next refresh
+        session_store.request_stop(_calibration_key(session_id))
+        
+        return jsonify({'message': 'Calibration cancellation requested'}), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _register_trained_model(user_id):
+    """Record the model train_model.py just wrote and make it the active version"""
+    entry = model_registry.build_model_entry(model_registry.load_trained_metadata(user_id))
+    mongo.db.models.update_many(model_registry.active_query(user_id), {'$set': {'is_active': False}})
+    mongo.db.models.insert_one(entry)
+    _prune_model_versions(user_id)
+    return entry
+
+def _prune_model_versions(user_id):
+    """Delete inactive versions beyond the retention limit, files first"""
+    models = list(mongo.db.models.find(
+        {'user_id': user_id}, {'user_id': 1, 'version': 1, 'is_active': 1, 'model_file': 1, 'scaler_file': 1}
+    ).sort('_id', -1))
+    for model in model_registry.stale_versions(models):
+        model_registry.delete_model_artifacts(model)
+        mongo.db.models.delete_one({'_id': model['_id']})
+
+def _needs_training(user_id):
+    """Whether there is no active model or calibration data changed since it was registered"""
+    active = mongo.db.models.find_one(model_registry.active_query(user_id), {'registered_at': 1})
+    latest_calibration = active and mongo.db.calibrations.find_one(
+        {'user_id': user_id}, {'timestamp': 1}, sort=[('timestamp', -1)]
+    )
+    return model_registry.needs_training(active, latest_calibration)
+
+def _activate_model(user_id, model):
+    """Swap the active model files to the given version and update the registry"""
+    model_registry.activate_model_artifacts(model)
+    activated_at = datetime.utcnow()
+    mongo.db.models.update_many(
+        model_registry.active_query(user_id, exclude_id=model['_id']),
+        {'$set': {'is_active': False}}
+    )
+    mongo.db.models.update_one(
+        {'_id': model['_id']},
+        {'$set': {'is_active': True, 'activated_at': activated_at}}
+    )
+    return model_registry.activated_model(model, activated_at)
+
+def _stop_local_monitoring(owner):
+    """Stop the prediction process of the owner's session and give the session up"""
+    with monitoring_lock:
+        process = None
+        if monitoring_state['owner'] == owner:
+            process = monitoring_state['process']
+            monitoring_state.update(owner=None, process=None)
+    if process and process.poll() is None:
+        process.terminate()
+    session_store.release(MONITORING_SESSION, owner)
+
+def _watch_monitoring_session(owner):
+    """Keep the owned session alive and stop when asked to by any worker"""
+    while True:
+        session = session_store.update(MONITORING_SESSION, owner)
+        with monitoring_lock:
+            process = monitoring_state['process'] if monitoring_state['owner'] == owner else None
+        if not session or session.get('stop_requested') or (process and process.poll() is not None):
+            _stop_local_monitoring(owner)
+            break
+        time.sleep(MONITORING_REFRESH_INTERVAL)
+
 @app.route('/api/monitoring/start', methods=['POST'])
 @token_required
 def start_monitoring(current_user_id):
     try:
-        if monitoring_state['active']:
+        owner = session_owner()
+        if not session_store.claim(MONITORING_SESSION, owner, {
+            'user_id': current_user_id,
+            'current_posture': 'good',
+            'degradation': 'full'
+        }):
             return jsonify({'error': 'Monitoring is already active'}), 400
         
-        # First, train the model
-        print("Training model...")
-        train_result = subprocess.run([
-            'python', 'scripts/train_model.py',
-            '--user_id', current_user_id
-        ], capture_output=True, text=True, cwd='backend')
-        
-        if train_result.returncode != 0:
-            return jsonify({'error': f'Model training failed: {train_result.stderr}'}), 500
+        # A worker runs one prediction process; one left from a lost session is stopped
+        with monitoring_lock:
+            previous = monitoring_state['process']
+            monitoring_state.update(owner=owner, process=None)
+        if previous and previous.poll() is None:
+            previous.terminate()
         
-        print("Model training completed. Starting live prediction...")
+        watch_thread = threading.Thread(target=_watch_monitoring_session, args=(owner,))
+        watch_thread.daemon = True
+        watch_thread.start()
         
-        # Start live prediction in a separate thread
-        def run_prediction():
-            global monitoring_state
-            try:
-                process = subprocess.Popen([
-                    'python', 'scripts/predict_live.py',
-                    '--user_id', current_user_id
-                ], cwd='backend', stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            data = request.get_json(silent=True) or {}
+            
+            # First, train the model unless the active one is newer than the latest calibration
+            if data.get('retrain') or _needs_training(current_user_id):
+                print("Training model...")
+                train_result = subprocess.run(
+                    ['python', *monitoring.training_argv(current_user_id)],
+                    capture_output=True, text=True, cwd='backend'
+                )
                 
-                monitoring_state['process'] = process
+                if train_result.returncode != 0:
+                    _stop_local_monitoring(owner)
+                    return jsonify({'error': f'Model training failed: {train_result.stderr}'}), 500
                 
-                # Read predictions and update posture status
+                _register_trained_model(current_user_id)
+                print("Model training completed. Starting live prediction...")
+            else:
+                print("Using active model. Starting live prediction...")
+            
+            process = subprocess.Popen(
+                ['python', *monitoring.prediction_argv(current_user_id, app.config['SERIAL_PORT'])],
+                cwd='backend', stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            
+        except Exception:
+            _stop_local_monitoring(owner)
+            raise
+        
+        with monitoring_lock:
+            started = monitoring_state['owner'] == owner
+            if started:
+                monitoring_state['process'] = process
+        session = session_store.get(MONITORING_SESSION)
+        if not started or not session or session['owner'] != owner:
+            # Stopped while the model was training
+            process.terminate()
+            _stop_local_monitoring(owner)
+            return jsonify({'error': 'Monitoring was stopped before it started'}), 409
+        
+        # Read predictions in a separate thread and update posture status
+        def run_prediction():
+            try:
                 for line in iter(process.stdout.readline, ''):
-                    if line.strip():
-                        try:
-                            prediction_data = json.loads(line.strip())
-                            monitoring_state['current_posture'] = prediction_data.get('posture', 'good')
-                        except json.JSONDecodeError:
-                            continue
+                    status = monitoring.parse_prediction_line(line)
+                    if status and not session_store.update(MONITORING_SESSION, owner, status):
+                        # The session ended, so nothing may write to whichever one replaced it
+                        break
                 
             except Exception as e:
                 print(f"Prediction error: {e}")
-                monitoring_state['active'] = False
-                monitoring_state['process'] = None
+            finally:
+                if process.poll() is None:
+                    process.terminate()
+                _stop_local_monitoring(owner)
         
         prediction_thread = threading.Thread(target=run_prediction)
         prediction_thread.daemon = True
         prediction_thread.start()
         
-        monitoring_state['active'] = True
-        monitoring_state['user_id'] = current_user_id
-        
         return jsonify({'message': 'Monitoring started successfully'}), 200
         
     except Exception as e:
@@ -286,21 +528,24 @@ def start_monitoring(current_user_id):
 @token_required
 def stop_monitoring(current_user_id):
     try:
-        global monitoring_state
-        
-        if not monitoring_state['active']:
+        session = session_store.get(MONITORING_SESSION)
+        if not session:
             return jsonify({'error': 'Monitoring is not active'}), 400
         
-        # Stop the prediction process
-        if monitoring_state['process']:
-            monitoring_state['process'].terminate()
-            monitoring_state['process'] = None
+        # Stop the prediction process directly if this worker owns it
+        if session['owner'] == monitoring_state['owner']:
+            _stop_local_monitoring(session['owner'])
+            return jsonify({'message': 'Monitoring stopped successfully'}), 200
         
-        monitoring_state['active'] = False
-        monitoring_state['user_id'] = None
-        monitoring_state['current_posture'] = 'good'
+        # Otherwise ask the owning worker and wait briefly for it to finish
+        session_store.request_stop(MONITORING_SESSION)
+        deadline = time.time() + MONITORING_STOP_TIMEOUT
+        while time.time() < deadline:
+            if not session_store.get(MONITORING_SESSION):
+                return jsonify({'message': 'Monitoring stopped successfully'}), 200
+            time.sleep(0.2)
         
-        return jsonify({'message': 'Monitoring stopped successfully'}), 200
+        return jsonify({'message': 'Monitoring stop requested'}), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -308,11 +553,8 @@ def stop_monitoring(current_user_id):
 @app.route('/api/monitoring/status', methods=['GET'])
 def get_monitoring_status():
     try:
-        return jsonify({
-            'active': monitoring_state['active'],
-            'user_id': monitoring_state['user_id'],
-            'current_posture': monitoring_state['current_posture']
-        }), 200
+        session = session_store.get(MONITORING_SESSION)
+        return jsonify(monitoring.status_response(session)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -324,14 +566,93 @@ def get_user_models(current_user_id, user_id):
         if current_user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Get models from database
-        models = list(mongo.db.models.find({'user_id': user_id}))
+        try:
+            limit, cursor, projection = model_registry.parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Get one page of models from database, fetching one extra to know if more remain
+        models = list(
+            mongo.db.models.find(model_registry.page_query(user_id, cursor), projection)
+            .sort('_id', -1)
+            .limit(limit + 1)
+        )
+        
+        return jsonify(model_registry.page_response(models, limit)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/<model_id>/activate', methods=['POST'])
+@token_required
+def activate_user_model(current_user_id, user_id, model_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        object_id = model_registry.parse_object_id(model_id)
+        model = object_id and mongo.db.models.find_one({'_id': object_id, 'user_id': user_id})
+        if not model:
+            return jsonify({'error': 'Model not found'}), 404
+        
+        try:
+            model = _activate_model(user_id, model)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 409
+        
+        return jsonify({'message': 'Model activated successfully', 'model': model}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/rollback', methods=['POST'])
+@token_required
+def rollback_user_model(current_user_id, user_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        active = mongo.db.models.find_one(model_registry.active_query(user_id), {'_id': 1})
+        if not active:
+            return jsonify({'error': 'No active model to roll back from'}), 400
         
-        # Convert ObjectId to string
-        for model in models:
-            model['_id'] = str(model['_id'])
+        # The previous version is the newest model registered before the active one
+        previous = mongo.db.models.find_one(
+            model_registry.previous_version_query(user_id, active['_id']),
+            sort=[('_id', -1)]
+        )
+        if not previous:
+            return jsonify({'error': 'No earlier model version to roll back to'}), 400
+        
+        try:
+            model = _activate_model(user_id, previous)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 409
         
-        return jsonify(models), 200
+        return jsonify({'message': 'Model rolled back successfully', 'model': model}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/<model_id>', methods=['DELETE'])
+@token_required
+def delete_user_model(current_user_id, user_id, model_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        object_id = model_registry.parse_object_id(model_id)
+        model = object_id and mongo.db.models.find_one({'_id': object_id, 'user_id': user_id})
+        if not model:
+            return jsonify({'error': 'Model not found'}), 404
+        if model.get('is_active'):
+            return jsonify({'error': 'The active model cannot be deleted, activate another version first'}), 409
+        
+        # Files go first so a failure leaves the entry to retry the delete from
+        model_registry.delete_model_artifacts(model)
+        mongo.db.models.delete_one({'_id': object_id})
+        
+        return jsonify({'message': 'Model deleted successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -341,4 +662,7 @@ if __name__ == '__main__':
     os.makedirs('backend/data', exist_ok=True)
     os.makedirs('backend/models', exist_ok=True)
     
+    # Registry pages are listed per user, newest first
+    mongo.db.models.create_index([('user_id', 1), ('_id', -1)])
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
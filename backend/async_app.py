@@ -0,0 +1,621 @@
+"""
+Async API server for SpineGuard
+Serves the same /api/* routes as app.py on asyncio (Quart + Motor) so idle
+dashboard connections and running calibrations don't each hold a thread.
+
+Install backend/requirements-async.txt into its own environment (Quart
+cannot share one with Flask 2.3), then run from the repository root with:
+    PYTHONPATH=backend hypercorn async_app:app --bind 0.0.0.0:5000
+"""
+
+from quart import Quart, request, jsonify, Response
+from quart_cors import cors
+from motor.motor_asyncio import AsyncIOMotorClient
+from werkzeug.security import generate_password_hash, check_password_hash
+from bson.objectid import ObjectId
+from datetime import datetime
+import asyncio
+import os
+import json
+import time
+import uuid
+from functools import wraps
+import auth
+import calibration
+import model_registry
+import monitoring
+
+app = Quart(__name__)
+app.config['SECRET_KEY'] = 'your-secret-key-change-this'
+app.config['MONGO_URI'] = 'mongodb://localhost:27017/spineguard'
+app.config['SERIAL_PORT'] = os.environ.get('SPINEGUARD_SERIAL_PORT', 'COM3')
+
+app = cors(app)
+
+mongo_client = None
+db = None
+
+# Global variables for monitoring state
+monitoring_state = {
+    'active': False,
+    'owner': None,  # Token of the start request that holds the session
+    'user_id': None,
+    'process': None,
+    'task': None,
+    'current_posture': 'good',
+    'degradation': 'full'
+}
+
+# Calibration sessions keyed by session id, guarded by calibration_condition
+calibration_sessions = {}
+calibration_condition = None
+
+@app.before_serving
+async def connect_database():
+    global mongo_client, db, calibration_condition
+    mongo_client = AsyncIOMotorClient(app.config['MONGO_URI'])
+    db = mongo_client.get_default_database()
+    calibration_condition = asyncio.Condition()
+
+    # Registry pages are listed per user, newest first
+    await db.models.create_index([('user_id', 1), ('_id', -1)])
+
+@app.after_serving
+async def close_database():
+    if monitoring_state['process'] and monitoring_state['process'].returncode is None:
+        monitoring_state['process'].terminate()
+    for session in calibration_sessions.values():
+        if session['process'] and session['process'].returncode is None:
+            session['process'].terminate()
+    mongo_client.close()
+
+def token_required(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        try:
+            current_user_id = auth.decode_token(request.headers.get('Authorization'), app.config['SECRET_KEY'])
+        except auth.AuthError as e:
+            return jsonify({'error': str(e)}), 401
+
+        return await f(current_user_id, *args, **kwargs)
+    return decorated
+
+def stream_token_required(f):
+    """token_required for EventSource streams, which pass a session's stream token in the URL"""
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        try:
+            current_user_id = auth.decode_stream_token(
+                request.args.get('stream_token'), kwargs.get('session_id'), app.config['SECRET_KEY']
+            )
+        except auth.AuthError as e:
+            return jsonify({'error': str(e)}), 401
+
+        return await f(current_user_id, *args, **kwargs)
+    return decorated
+
+async def run_script(*args):
+    """Start a backend script as a non-blocking subprocess"""
+    return await asyncio.create_subprocess_exec(
+        'python', *args,
+        cwd='backend',
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+@app.route('/api/register', methods=['POST'])
+async def register():
+    try:
+        data = await request.get_json()
+        try:
+            username, password = auth.parse_credentials(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Check if user already exists
+        if await db.users.find_one({'username': username}, {'_id': 1}):
+            return jsonify({'error': 'Username already exists'}), 400
+
+        # Password hashing is CPU-bound, keep it off the event loop
+        hashed_password = await asyncio.to_thread(generate_password_hash, password)
+        user_data = auth.new_user_document(username, hashed_password, data.get('email', ''))
+
+        result = await db.users.insert_one(user_data)
+        user_id = str(result.inserted_id)
+
+        # Generate token
+        token = auth.issue_token(user_id, app.config['SECRET_KEY'])
+
+        return jsonify({
+            'message': 'User created successfully',
+            'user_id': user_id,
+            'username': username,
+            'token': token
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/login', methods=['POST'])
+async def login():
+    try:
+        try:
+            username, password = auth.parse_credentials(await request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Find user
+        user = await db.users.find_one({'username': username}, {'username': 1, 'password': 1})
+        if not user or not await asyncio.to_thread(check_password_hash, user['password'], password):
+            return jsonify({'error': 'Invalid username or password'}), 401
+
+        # Generate token
+        token = auth.issue_token(str(user['_id']), app.config['SECRET_KEY'])
+
+        return jsonify({
+            'message': 'Login successful',
+            'user_id': str(user['_id']),
+            'username': user['username'],
+            'token': token
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/settings', methods=['GET'])
+@token_required
+async def get_user_settings(current_user_id, user_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        user = await db.users.find_one({'_id': ObjectId(user_id)}, {'settings': 1})
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        return jsonify(user.get('settings', {})), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/settings', methods=['PUT'])
+@token_required
+async def update_user_settings(current_user_id, user_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        data = await request.get_json()
+
+        await db.users.update_one(
+            {'_id': ObjectId(user_id)},
+            {'$set': {'settings': data}}
+        )
+
+        return jsonify({'message': 'Settings updated successfully'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _prune_calibration_sessions():
+    """Drop finished calibration sessions older than the TTL"""
+    now = time.time()
+    expired = [
+        session_id for session_id, session in calibration_sessions.items()
+        if calibration.is_expired(session, now)
+    ]
+    for session_id in expired:
+        del calibration_sessions[session_id]
+
+async def _update_calibration_session(session, **fields):
+    """Apply a progress update and wake up any stream subscribers"""
+    async with calibration_condition:
+        session.update(fields)
+        session['version'] += 1
+        calibration_condition.notify_all()
+
+async def _run_calibration(session):
+    """Run serial_reader.py for a session and relay its JSON progress lines"""
+    try:
+        process = await run_script(*calibration.reader_argv(session, app.config['SERIAL_PORT']))
+        session['process'] = process
+        if session['status'] == 'cancelling':
+            process.terminate()
+
+        async for raw_line in process.stdout:
+            event = calibration.parse_event(raw_line.decode('utf-8', errors='replace'))
+            if event:
+                await _update_calibration_session(session, **calibration.progress_update(session, event))
+
+        stderr = (await process.stderr.read()).decode('utf-8', errors='replace')
+        returncode = await process.wait()
+
+        outcome = calibration.outcome_update(session, returncode, stderr)
+        if outcome:
+            await _update_calibration_session(session, **outcome)
+        else:
+            # Save calibration data to database
+            await db.calibrations.insert_one(calibration.calibration_record(session))
+            await _update_calibration_session(session, **calibration.completed_update(session))
+
+    except Exception as e:
+        await _update_calibration_session(session, status='failed', error=str(e))
+    finally:
+        await _update_calibration_session(session, process=None, finished_at=time.time())
+
+async def _start_calibration(current_user_id, posture):
+    """Start a background calibration session and return its initial state"""
+    data = await request.get_json(silent=True) or {}
+    try:
+        samples = calibration.parse_samples(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    _prune_calibration_sessions()
+    for session in calibration_sessions.values():
+        if session['user_id'] == current_user_id and not session['finished_at']:
+            return jsonify({
+                'error': 'A calibration is already running',
+                'session': calibration.snapshot(session)
+            }), 409
+
+    session = calibration.new_session(current_user_id, posture, samples)
+    calibration_sessions[session['session_id']] = session
+    app.add_background_task(_run_calibration, session)
+
+    return jsonify(calibration.snapshot(session)), 202
+
+def _get_owned_session(current_user_id, session_id):
+    """Look up a calibration session, returning (session, error_response)"""
+    session = calibration_sessions.get(session_id)
+    if not session:
+        return None, (jsonify({'error': 'Calibration session not found'}), 404)
+    if session['user_id'] != current_user_id:
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
+    return session, None
+
+@app.route('/api/calibrate/good', methods=['POST'])
+@token_required
+async def calibrate_good_posture(current_user_id):
+    try:
+        return await _start_calibration(current_user_id, 'good')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/bad', methods=['POST'])
+@token_required
+async def calibrate_bad_posture(current_user_id):
+    try:
+        return await _start_calibration(current_user_id, 'bad')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/sessions/<session_id>', methods=['GET'])
+@token_required
+async def get_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
+        # Lets the client open the progress stream without putting its API token in a URL
+        stream_token = auth.issue_stream_token(current_user_id, session_id, app.config['SECRET_KEY'])
+        return jsonify(dict(calibration.snapshot(session), stream_token=stream_token)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/sessions/<session_id>/stream', methods=['GET'])
+@stream_token_required
+async def stream_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
+
+        async def generate():
+            last_version = -1
+            while True:
+                async with calibration_condition:
+                    if session['version'] == last_version:
+                        try:
+                            # Wake up periodically so idle streams still get a keep-alive
+                            await asyncio.wait_for(calibration_condition.wait(), timeout=15)
+                        except asyncio.TimeoutError:
+                            pass
+                    if session['version'] == last_version:
+                        snapshot = None
+                    else:
+                        last_version = session['version']
+                        snapshot = calibration.snapshot(session)
+
+                if snapshot is None:
+                    yield b': keep-alive\n\n'
+                    continue
+
+                yield f"data: {json.dumps(snapshot)}\n\n".encode('utf-8')
+                if snapshot['finished_at']:
+                    break
+
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.timeout = None
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calibrate/sessions/<session_id>/cancel', methods=['POST'])
+@token_required
+async def cancel_calibration_session(current_user_id, session_id):
+    try:
+        session, error = _get_owned_session(current_user_id, session_id)
+        if error:
+            return error
+        if session['finished_at']:
+            return jsonify({'error': 'Calibration session is not running'}), 400
+
+        await _update_calibration_session(session, status='cancelling')
+
+        # If the process hasn't spawned yet, the task terminates it on startup
+        if session['process'] and session['process'].returncode is None:
+            session['process'].terminate()
+
+        return jsonify({'message': 'Calibration cancellation requested'}), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _end_monitoring(owner):
+    """Stop the owner's prediction process and clear the session, unless a newer start holds it"""
+    if monitoring_state['owner'] != owner:
+        return
+    process = monitoring_state['process']
+    if process and process.returncode is None:
+        process.terminate()
+    monitoring_state.update(
+        active=False, owner=None, user_id=None, process=None, task=None,
+        current_posture='good', degradation='full'
+    )
+
+async def _run_prediction(current_user_id, owner):
+    """Read predictions from predict_live.py and update posture status"""
+    process = None
+    try:
+        process = await run_script(*monitoring.prediction_argv(current_user_id, app.config['SERIAL_PORT']))
+        if monitoring_state['owner'] != owner:
+            # Stopped while predict_live.py was starting
+            return
+        monitoring_state['process'] = process
+
+        async for raw_line in process.stdout:
+            if monitoring_state['owner'] != owner:
+                break
+            status = monitoring.parse_prediction_line(raw_line.decode('utf-8', errors='replace'))
+            if status:
+                monitoring_state.update(status)
+
+        await process.wait()
+
+    except Exception as e:
+        print(f"Prediction error: {e}")
+    finally:
+        # predict_live.py also exits on its own (no serial port, missing model),
+        # which must not leave the session marked active
+        if process and process.returncode is None:
+            process.terminate()
+        _end_monitoring(owner)
+
+async def _register_trained_model(user_id):
+    """Record the model train_model.py just wrote and make it the active version"""
+    metadata = await asyncio.to_thread(model_registry.load_trained_metadata, user_id)
+    entry = model_registry.build_model_entry(metadata)
+    await db.models.update_many(model_registry.active_query(user_id), {'$set': {'is_active': False}})
+    await db.models.insert_one(entry)
+    await _prune_model_versions(user_id)
+    return entry
+
+async def _prune_model_versions(user_id):
+    """Delete inactive versions beyond the retention limit, files first"""
+    models = await db.models.find(
+        {'user_id': user_id}, {'user_id': 1, 'version': 1, 'is_active': 1, 'model_file': 1, 'scaler_file': 1}
+    ).sort('_id', -1).to_list(length=None)
+    for model in model_registry.stale_versions(models):
+        await asyncio.to_thread(model_registry.delete_model_artifacts, model)
+        await db.models.delete_one({'_id': model['_id']})
+
+async def _needs_training(user_id):
+    """Whether there is no active model or calibration data changed since it was registered"""
+    active = await db.models.find_one(model_registry.active_query(user_id), {'registered_at': 1})
+    latest_calibration = active and await db.calibrations.find_one(
+        {'user_id': user_id}, {'timestamp': 1}, sort=[('timestamp', -1)]
+    )
+    return model_registry.needs_training(active, latest_calibration)
+
+async def _activate_model(user_id, model):
+    """Swap the active model files to the given version and update the registry"""
+    await asyncio.to_thread(model_registry.activate_model_artifacts, model)
+    activated_at = datetime.utcnow()
+    await db.models.update_many(
+        model_registry.active_query(user_id, exclude_id=model['_id']),
+        {'$set': {'is_active': False}}
+    )
+    await db.models.update_one(
+        {'_id': model['_id']},
+        {'$set': {'is_active': True, 'activated_at': activated_at}}
+    )
+    return model_registry.activated_model(model, activated_at)
+
+@app.route('/api/monitoring/start', methods=['POST'])
+@token_required
+async def start_monitoring(current_user_id):
+    owner = None
+    try:
+        if monitoring_state['active']:
+            return jsonify({'error': 'Monitoring is already active'}), 400
+
+        # Claim the session before awaiting so concurrent starts are rejected; the owner
+        # token tells this start apart from a later one if /stop runs while it awaits
+        owner = uuid.uuid4().hex
+        monitoring_state.update(active=True, owner=owner, user_id=current_user_id)
+
+        data = await request.get_json(silent=True) or {}
+
+        # First, train the model unless the active one is newer than the latest calibration
+        if data.get('retrain') or await _needs_training(current_user_id):
+            print("Training model...")
+            train_process = await run_script(*monitoring.training_argv(current_user_id))
+            _, train_stderr = await train_process.communicate()
+
+            if train_process.returncode != 0:
+                _end_monitoring(owner)
+                return jsonify({'error': f"Model training failed: {train_stderr.decode('utf-8', errors='replace')}"}), 500
+
+            await _register_trained_model(current_user_id)
+            print("Model training completed. Starting live prediction...")
+        else:
+            print("Using active model. Starting live prediction...")
+
+        if monitoring_state['owner'] != owner:
+            # Stopped while the model was training
+            return jsonify({'error': 'Monitoring was stopped before it started'}), 409
+
+        monitoring_state['task'] = asyncio.create_task(_run_prediction(current_user_id, owner))
+
+        return jsonify({'message': 'Monitoring started successfully'}), 200
+
+    except Exception as e:
+        if owner:
+            _end_monitoring(owner)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/monitoring/stop', methods=['POST'])
+@token_required
+async def stop_monitoring(current_user_id):
+    try:
+        if not monitoring_state['active']:
+            return jsonify({'error': 'Monitoring is not active'}), 400
+
+        # Stop the prediction process; a start still training sees it lost its session
+        _end_monitoring(monitoring_state['owner'])
+
+        return jsonify({'message': 'Monitoring stopped successfully'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/monitoring/status', methods=['GET'])
+async def get_monitoring_status():
+    try:
+        return jsonify(monitoring.status_response(monitoring_state)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models', methods=['GET'])
+@token_required
+async def get_user_models(current_user_id, user_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        try:
+            limit, cursor, projection = model_registry.parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Get one page of models from database, fetching one extra to know if more remain
+        models = await (
+            db.models.find(model_registry.page_query(user_id, cursor), projection)
+            .sort('_id', -1)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+
+        return jsonify(model_registry.page_response(models, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/<model_id>/activate', methods=['POST'])
+@token_required
+async def activate_user_model(current_user_id, user_id, model_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        object_id = model_registry.parse_object_id(model_id)
+        model = object_id and await db.models.find_one({'_id': object_id, 'user_id': user_id})
+        if not model:
+            return jsonify({'error': 'Model not found'}), 404
+
+        try:
+            model = await _activate_model(user_id, model)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 409
+
+        return jsonify({'message': 'Model activated successfully', 'model': model}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/rollback', methods=['POST'])
+@token_required
+async def rollback_user_model(current_user_id, user_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        active = await db.models.find_one(model_registry.active_query(user_id), {'_id': 1})
+        if not active:
+            return jsonify({'error': 'No active model to roll back from'}), 400
+
+        # The previous version is the newest model registered before the active one
+        previous = await db.models.find_one(
+            model_registry.previous_version_query(user_id, active['_id']),
+            sort=[('_id', -1)]
+        )
+        if not previous:
+            return jsonify({'error': 'No earlier model version to roll back to'}), 400
+
+        try:
+            model = await _activate_model(user_id, previous)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 409
+
+        return jsonify({'message': 'Model rolled back successfully', 'model': model}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<user_id>/models/<model_id>', methods=['DELETE'])
+@token_required
+async def delete_user_model(current_user_id, user_id, model_id):
+    try:
+        if current_user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        object_id = model_registry.parse_object_id(model_id)
+        model = object_id and await db.models.find_one({'_id': object_id, 'user_id': user_id})
+        if not model:
+            return jsonify({'error': 'Model not found'}), 404
+        if model.get('is_active'):
+            return jsonify({'error': 'The active model cannot be deleted, activate another version first'}), 409
+
+        # Files go first so a failure leaves the entry to retry the delete from
+        await asyncio.to_thread(model_registry.delete_model_artifacts, model)
+        await db.models.delete_one({'_id': object_id})
+
+        return jsonify({'message': 'Model deleted successfully'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+if __name__ == '__main__':
+    # Create necessary directories
+    os.makedirs('backend/data', exist_ok=True)
+    os.makedirs('backend/models', exist_ok=True)
+
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,87 @@
+"""
+Authentication helpers for SpineGuard
+Shared by app.py and async_app.py: user documents and JWT handling.
+"""
+
+from datetime import datetime, timedelta
+import jwt
+
+TOKEN_LIFETIME = timedelta(days=30)
+
+# EventSource cannot send headers, so calibration progress streams take a
+# token in the URL instead; it only opens one session's stream and expires soon
+STREAM_TOKEN_LIFETIME = timedelta(minutes=5)
+STREAM_TOKEN_SCOPE = 'calibration_stream'
+
+DEFAULT_SETTINGS = {
+    'voice_alerts': True,
+    'sound_type': 'voice',
+    'alert_threshold': 10,
+    'volume': 80,
+    'notifications': True
+}
+
+class AuthError(Exception):
+    """Raised when a request's token is missing or invalid"""
+
+def parse_credentials(data):
+    """Username and password from a request body, raising ValueError if either is missing"""
+    data = data or {}
+    username = data.get('username')
+    password = data.get('password')
+    if not username or not password:
+        raise ValueError('Username and password are required')
+    return username, password
+
+def new_user_document(username, hashed_password, email):
+    """User document for a new registration"""
+    return {
+        'username': username,
+        'password': hashed_password,
+        'email': email,
+        'created_at': datetime.utcnow(),
+        'settings': dict(DEFAULT_SETTINGS)
+    }
+
+def issue_token(user_id, secret_key):
+    """Long-lived API token for a user"""
+    return jwt.encode({
+        'user_id': user_id,
+        'exp': datetime.utcnow() + TOKEN_LIFETIME
+    }, secret_key)
+
+def issue_stream_token(user_id, session_id, secret_key):
+    """Short-lived token for one calibration session's progress stream"""
+    return jwt.encode({
+        'user_id': user_id,
+        'session_id': session_id,
+        'scope': STREAM_TOKEN_SCOPE,
+        'exp': datetime.utcnow() + STREAM_TOKEN_LIFETIME
+    }, secret_key)
+
+def _decode(token, secret_key):
+    if not token:
+        raise AuthError('Token is missing')
+    try:
+        data = jwt.decode(token, secret_key, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        raise AuthError('Token is invalid')
+    if 'user_id' not in data:
+        raise AuthError('Token is invalid')
+    return data
+
+def decode_token(authorization, secret_key):
+    """User id from an Authorization header value, raising AuthError if it is not usable"""
+    token = authorization[7:] if authorization and authorization.startswith('Bearer ') else authorization
+    data = _decode(token, secret_key)
+    if data.get('scope'):
+        # Stream tokens end up in URLs and logs, so they never authorize API calls
+        raise AuthError('Token is invalid')
+    return data['user_id']
+
+def decode_stream_token(token, session_id, secret_key):
+    """User id from a stream token, raising AuthError unless it was issued for session_id"""
+    data = _decode(token, secret_key)
+    if data.get('scope') != STREAM_TOKEN_SCOPE or data.get('session_id') != session_id:
+        raise AuthError('Token is invalid')
+    return data['user_id']
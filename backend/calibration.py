@@ -0,0 +1,120 @@
+"""
+Calibration session helpers for SpineGuard
+Shared by app.py and async_app.py: session documents, serial_reader.py
+arguments and how its JSON progress lines update a session.
+"""
+
+from datetime import datetime
+import json
+import time
+import uuid
+
+CALIBRATION_SESSION_TTL = 600  # Seconds a finished session stays queryable
+
+# Keys kept server-side only, including the session store's bookkeeping
+PRIVATE_FIELDS = ('process', '_id', 'owner', 'active', 'stop_requested', 'expires_at')
+
+def parse_samples(data):
+    """Requested sample count, raising ValueError if it is not a positive integer"""
+    try:
+        samples = int(data.get('samples', 200))
+    except (TypeError, ValueError):
+        raise ValueError('samples must be a positive integer')
+    if samples <= 0:
+        raise ValueError('samples must be a positive integer')
+    return samples
+
+def new_session(user_id, posture, samples):
+    """Initial state of a calibration session"""
+    return {
+        'session_id': uuid.uuid4().hex,
+        'user_id': user_id,
+        'posture': posture,
+        'status': 'starting',
+        'target': samples,
+        'collected': 0,
+        'progress': 0.0,
+        'rate': 0.0,
+        'dropped': 0,
+        'message': None,
+        'error': None,
+        'started_at': time.time(),
+        'finished_at': None,
+        'version': 0,
+        'process': None
+    }
+
+def snapshot(session):
+    """Public view of a calibration session"""
+    public = {key: value for key, value in session.items() if key not in PRIVATE_FIELDS}
+    if session.get('stop_requested') and not session['finished_at']:
+        # Cancelled through the session store, but serial_reader.py hasn't stopped yet
+        public['status'] = 'cancelling'
+    return public
+
+def is_expired(session, now=None):
+    """Whether a finished session is past its TTL"""
+    now = now or time.time()
+    return bool(session['finished_at'] and now - session['finished_at'] > CALIBRATION_SESSION_TTL)
+
+def reader_argv(session, port):
+    """Arguments for running serial_reader.py for a session, relative to backend/"""
+    return [
+        'scripts/serial_reader.py',
+        '--mode', f"calibrate_{session['posture']}",
+        '--samples', str(session['target']),
+        '--user_id', session['user_id'],
+        '--progress', 'json',
+        '--port', port
+    ]
+
+def parse_event(line):
+    """Progress event from one serial_reader.py output line, or None if it is not one"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+def progress_update(session, event):
+    """Session fields changed by one serial_reader.py progress event"""
+    update = {'message': event.get('message', session['message'])}
+    for key in ('collected', 'rate', 'dropped', 'progress'):
+        if key in event:
+            update[key] = event[key]
+    if event.get('event') == 'countdown':
+        update['status'] = 'countdown'
+    elif event.get('event') in ('started', 'progress') and session['status'] != 'cancelling':
+        update['status'] = 'collecting'
+    elif event.get('event') == 'error':
+        update['error'] = event.get('message')
+    return update
+
+def outcome_update(session, returncode, stderr):
+    """Session fields once serial_reader.py has exited, or None if it succeeded"""
+    if session['status'] == 'cancelling':
+        return {'status': 'cancelled', 'message': 'Calibration cancelled'}
+    if returncode != 0:
+        return {'status': 'failed', 'error': session['error'] or stderr.strip() or 'Calibration failed'}
+    return None
+
+def completed_update(session):
+    """Session fields for a successful calibration"""
+    return {
+        'status': 'completed',
+        'progress': 100.0,
+        'message': f"{session['posture'].capitalize()} posture calibration completed successfully"
+    }
+
+def calibration_record(session):
+    """Document saved to the calibrations collection for a completed session"""
+    return {
+        'user_id': session['user_id'],
+        'type': f"{session['posture']}_posture",
+        'samples': session['collected'],
+        'dropped': session['dropped'],
+        'timestamp': datetime.utcnow(),
+        'data_file': f"data/{session['posture']}_posture_{session['user_id']}.csv"
+    }
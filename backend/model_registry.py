@@ -0,0 +1,178 @@
+"""
+Model registry helpers for SpineGuard
+Shared by app.py and async_app.py: turns training metadata into registry
+entries, handles pagination arguments and swaps the active model files.
+"""
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+import json
+import os
+import shutil
+
+BACKEND_DIR = 'backend'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_MODEL_VERSIONS = 10  # Versions kept per user; older inactive ones are deleted
+
+# Fields a client may request with ?fields=
+MODEL_FIELDS = [
+    'name', 'version', 'accuracy', 'size', 'size_bytes', 'inference_latency_ms',
+    'training_time_s', 'created_at', 'is_active', 'activated_at', 'model_type',
+    'feature_columns', 'training_data', 'model_file', 'scaler_file'
+]
+
+# Server-only details left out of responses unless asked for
+HEAVY_FIELDS = ('training_data', 'feature_columns', 'model_file', 'scaler_file')
+
+def format_size(size_bytes):
+    """Human readable file size"""
+    size = float(size_bytes)
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def load_trained_metadata(user_id):
+    """Read the metadata train_model.py wrote for the user's newest model"""
+    metadata_filename = os.path.join(BACKEND_DIR, 'models', f'model_metadata_{user_id}.json')
+    with open(metadata_filename) as f:
+        return json.load(f)
+
+def build_model_entry(metadata):
+    """Registry document for a freshly trained model"""
+    return {
+        'user_id': metadata['user_id'],
+        'name': f"Model {metadata['version']}",
+        'version': metadata['version'],
+        'accuracy': round(metadata['accuracy'] * 100, 1),
+        'size': format_size(metadata['size_bytes']),
+        'size_bytes': metadata['size_bytes'],
+        'inference_latency_ms': metadata.get('inference_latency_ms'),
+        'training_time_s': metadata.get('training_time_s'),
+        'created_at': datetime.fromisoformat(metadata['created_at']),
+        'registered_at': datetime.utcnow(),
+        'model_type': metadata.get('model_type'),
+        'feature_columns': metadata.get('feature_columns'),
+        'training_data': metadata.get('training_data', {}),
+        'model_file': metadata['model_file'],
+        'scaler_file': metadata['scaler_file'],
+        'is_active': True,
+        'activated_at': datetime.utcnow()
+    }
+
+def parse_object_id(value):
+    """ObjectId from a string, or None if it is malformed"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+def parse_page_args(args):
+    """Read limit, cursor and fields query arguments, raising ValueError if they are invalid"""
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    cursor = None
+    if args.get('cursor'):
+        cursor = parse_object_id(args.get('cursor'))
+        if cursor is None:
+            raise ValueError('cursor is invalid')
+
+    fields = args.get('fields')
+    if fields:
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in MODEL_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        projection = {field: 1 for field in requested}
+    else:
+        # Heavy, server-only details are left out unless asked for
+        projection = {field: 0 for field in HEAVY_FIELDS}
+
+    return limit, cursor, projection
+
+def page_query(user_id, cursor):
+    """Query for one page, newest first, continuing after the cursor"""
+    query = {'user_id': user_id}
+    if cursor:
+        query['_id'] = {'$lt': cursor}
+    return query
+
+def active_query(user_id, exclude_id=None):
+    """Query for the user's active model, optionally ignoring one version"""
+    query = {'user_id': user_id, 'is_active': True}
+    if exclude_id is not None:
+        query['_id'] = {'$ne': exclude_id}
+    return query
+
+def stale_versions(models):
+    """Inactive versions beyond the retention limit, given a user's models newest first"""
+    return [model for model in models[MAX_MODEL_VERSIONS:] if not model.get('is_active')]
+
+def previous_version_query(user_id, active_id):
+    """Query for versions registered before the active one (sort by _id descending)"""
+    return {'user_id': user_id, '_id': {'$lt': active_id}}
+
+def needs_training(active, latest_calibration):
+    """Whether there is no active model or calibration data changed since it was registered"""
+    if not active:
+        return True
+    return bool(latest_calibration and latest_calibration['timestamp'] > active['registered_at'])
+
+def activated_model(model, activated_at):
+    """Response body entry for a model that was just made active"""
+    model.update({'is_active': True, 'activated_at': activated_at})
+    for key in HEAVY_FIELDS:
+        model.pop(key, None)
+    return serialize_model(model)
+
+def serialize_model(model):
+    """JSON-safe registry entry"""
+    model['id'] = str(model.pop('_id'))
+    for key in ('created_at', 'registered_at', 'activated_at'):
+        if isinstance(model.get(key), datetime):
+            model[key] = model[key].isoformat()
+    return model
+
+def page_response(models, limit):
+    """Response body for a page, with the cursor for the next one"""
+    has_more = len(models) > limit
+    models = models[:limit]
+    next_cursor = str(models[-1]['_id']) if has_more else None
+    return {
+        'models': [serialize_model(model) for model in models],
+        'next_cursor': next_cursor
+    }
+
+def activate_model_artifacts(model):
+    """Copy a version's files over the active model files predict_live.py loads"""
+    user_id = model['user_id']
+    targets = {
+        model['model_file']: f'models/posture_model_{user_id}.joblib',
+        model['scaler_file']: f'models/scaler_{user_id}.joblib'
+    }
+
+    for source, target in targets.items():
+        source_path = os.path.join(BACKEND_DIR, source)
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"Model artifact missing: {source}")
+
+    for source, target in targets.items():
+        target_path = os.path.join(BACKEND_DIR, target)
+        temp_path = f'{target_path}.tmp'
+        shutil.copyfile(os.path.join(BACKEND_DIR, source), temp_path)
+        os.replace(temp_path, target_path)
+
+def delete_model_artifacts(model):
+    """Remove a version's model, scaler and metadata files, ignoring ones already gone"""
+    metadata_file = f"models/model_metadata_{model['user_id']}_{model['version']}.json"
+    for path in (model['model_file'], model['scaler_file'], metadata_file):
+        try:
+            os.remove(os.path.join(BACKEND_DIR, path))
+        except FileNotFoundError:
+            pass
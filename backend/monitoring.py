@@ -0,0 +1,49 @@
+"""
+Monitoring helpers for SpineGuard
+Shared by app.py and async_app.py: script arguments for training and live
+prediction, and how prediction lines map onto the monitoring status.
+"""
+
+import json
+
+LATENCY_BUDGET_MS = 50
+
+def training_argv(user_id):
+    """Arguments for running train_model.py, relative to backend/"""
+    return ['scripts/train_model.py', '--user_id', user_id]
+
+def prediction_argv(user_id, port):
+    """Arguments for running predict_live.py, relative to backend/"""
+    # Only posture changes and heartbeats are needed to track current_posture
+    return [
+        'scripts/predict_live.py',
+        '--user_id', user_id,
+        '--emit', 'changes',
+        '--sensor_data', 'none',
+        '--latency_budget_ms', str(LATENCY_BUDGET_MS),
+        '--port', port
+    ]
+
+def parse_prediction_line(line):
+    """Status fields from one predict_live.py output line, or None if it is not a prediction"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        prediction_data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return {
+        'current_posture': prediction_data.get('posture', 'good'),
+        'degradation': prediction_data.get('degradation', 'full')
+    }
+
+def status_response(session):
+    """Body of /api/monitoring/status for the current session (None when idle)"""
+    session = session or {}
+    return {
+        'active': bool(session.get('active')),
+        'user_id': session.get('user_id'),
+        'current_posture': session.get('current_posture', 'good'),
+        'degradation': session.get('degradation', 'full')
+    }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Degradation Check for SpineGuard Live Prediction
+Runs LivePosturePredictor against a fake serial device with a near-free model
+and checks that an idle host stays at full prediction, i.e. that time spent
+waiting for the device never counts against the latency budget
+(the fake device is a pseudo-terminal, so this requires POSIX)
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from load_test import FakeSerialDevice
+from predict_live import DEGRADATION_LEVELS, LivePosturePredictor
+
+def build_model():
+    """Small forest on random frames, cheap enough that inference costs ~0 ms"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 6))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(scaler.transform(X), y)
+    return model, scaler
+
+def run_check(rate, phase, duration, latency_budget_ms):
+    """Run the predictor against a device sending rate frames per second, returning the levels it used"""
+    device = FakeSerialDevice(rate=rate)
+    predictor = LivePosturePredictor(
+        'check', port=device.port, emit_mode='changes', sensor_data_mode='none',
+        latency_budget_ms=latency_budget_ms
+    )
+    predictor.model, predictor.scaler = build_model()
+    predictor.reduced_model = predictor.build_reduced_model()
+
+    levels = []
+    device.start()
+    # Start the predictor at a different point of the device's frame period in each trial
+    time.sleep(phase)
+    thread = threading.Thread(target=predictor.start_monitoring)
+    thread.daemon = True
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            deadline = time.time() + duration
+            while time.time() < deadline:
+                time.sleep(0.1)
+                levels.append(predictor.degradation_level)
+            predictor.stop()
+            thread.join()
+    finally:
+        device.stop()
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser(description='Check SpineGuard live prediction stays undegraded when idle')
+    parser.add_argument('--rates', type=float, nargs='+', default=[9.5, 10.0],
+                        help='Device frame rates to try, in Hz (default: 9.5 10.0, like an Arduino delay(100) loop)')
+    parser.add_argument('--trials', type=int, default=3,
+                        help='Start-up phases tried per rate (default: 3)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds to run each trial after connecting (default: 10)')
+    parser.add_argument('--latency_budget_ms', type=float, default=50.0,
+                        help='Latency budget passed to the predictor, as the API does (default: 50)')
+
+    args = parser.parse_args()
+
+    failures = 0
+    for rate in args.rates:
+        for trial in range(args.trials):
+            phase = trial / args.trials / rate
+            levels = run_check(rate, phase, args.duration, args.latency_budget_ms)
+            worst = DEGRADATION_LEVELS[max(levels, default=0)]
+            passed = worst == 'full'
+            failures += not passed
+            print(f"{rate:5.1f} Hz, phase {phase:.3f}s: worst level {worst}, "
+                  f"final {DEGRADATION_LEVELS[levels[-1]] if levels else 'full'} "
+                  f"{'ok' if passed else 'FAILED'}")
+
+    if failures:
+        print(f"{failures} trial(s) degraded on an idle host")
+        exit(1)
+    print("All trials stayed at full prediction")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Load Test for the SpineGuard REST API
+Runs app.py in-process against mongomock (or a local mongod) and a fake
+serial device, or targets an already running server with --base_url,
+drives it with synthetic users and reports per-endpoint throughput,
+latency percentiles and error rates (the fake serial device is a
+pseudo-terminal, so running in-process requires POSIX)
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeSerialDevice:
+    """Pseudo-terminal that streams "ax,ay,az,gx,gy,gz" lines like the Arduino sketch"""
+
+    def __init__(self, rate=10.0):
+        import tty  # POSIX only, and only needed when no --base_url is given
+        self.rate = rate
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)  # No echo, so nothing accumulates on our side
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start writing sensor frames in the background"""
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop writing and close the pseudo-terminal"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def run(self):
+        slouching = False
+        next_switch = time.time() + 5
+        while self.running:
+            if time.time() >= next_switch:
+                slouching = not slouching
+                next_switch = time.time() + random.uniform(3, 8)
+
+            # Tilt forward while slouching, upright otherwise
+            base = [0.45, 0.05, 0.85, 4.0, 1.0, 0.5] if slouching else [0.02, 0.01, 1.0, 0.5, 0.3, 0.2]
+            frame = [value + random.gauss(0, 0.03) for value in base]
+            line = ','.join(f'{value:.4f}' for value in frame) + '\n'
+
+            try:
+                os.write(self.master_fd, line.encode('utf-8'))
+            except (BlockingIOError, OSError):
+                pass  # Nobody is reading, drop the frame like a real device would
+
+            time.sleep(1 / self.rate)
+
+class LoadStats:
+    """Thread-safe per-endpoint latency and status recorder"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, status, latency):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed):
+        """Per-endpoint throughput, latency percentiles and error rates"""
+        results = {}
+        with self.lock:
+            for endpoint, latencies in sorted(self.latencies.items()):
+                statuses = self.statuses[endpoint]
+                count = len(latencies)
+                server_errors = sum(n for status, n in statuses.items() if status == 0 or status >= 500)
+                client_errors = sum(n for status, n in statuses.items() if 400 <= status < 500)
+                ordered = sorted(latencies)
+                results[endpoint] = {
+                    'requests': count,
+                    'throughput_rps': round(count / elapsed, 2),
+                    'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+                    'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+                    'p99_ms': round(percentile(ordered, 99) * 1000, 1),
+                    'error_rate': round(server_errors / count, 4),
+                    'client_error_rate': round(client_errors / count, 4),
+                    'statuses': {str(status): n for status, n in sorted(statuses.items())}
+                }
+        return results
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+class SyntheticUser:
+    def __init__(self, index, base_url, stats, options):
+        self.username = f'loadtest_{index}_{random.randint(0, 10**6)}'
+        self.password = 'loadtest-password'
+        self.base_url = base_url
+        self.stats = stats
+        self.options = options
+        self.user_id = None
+        self.token = None
+        self.calibrated = set()
+
+    def request(self, method, path, endpoint, body=None):
+        """Send one request and record it under the endpoint template"""
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(f'{self.base_url}{path}', data=data, headers=headers, method=method)
+
+        started_at = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.options.request_timeout) as response:
+                status = response.status
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+            payload = e.read()
+        except (urllib.error.URLError, OSError):
+            status = 0
+            payload = b''
+        self.stats.record(f'{method} {endpoint}', status, time.perf_counter() - started_at)
+
+        try:
+            return status, json.loads(payload or b'null')
+        except json.JSONDecodeError:
+            return status, None
+
+    def register(self):
+        status, data = self.request('POST', '/api/register', '/api/register', {
+            'username': self.username,
+            'password': self.password,
+            'email': f'{self.username}@example.com'
+        })
+        if status == 201:
+            self.user_id = data['user_id']
+            self.token = data['token']
+        return status == 201
+
+    def login(self):
+        status, data = self.request('POST', '/api/login', '/api/login', {
+            'username': self.username,
+            'password': self.password
+        })
+        if status == 200:
+            self.token = data['token']
+
+    def get_settings(self):
+        self.request('GET', f'/api/user/{self.user_id}/settings', '/api/user/<id>/settings')
+
+    def update_settings(self):
+        self.request('PUT', f'/api/user/{self.user_id}/settings', '/api/user/<id>/settings', {
+            'voice_alerts': random.choice([True, False]),
+            'sound_type': 'voice',
+            'alert_threshold': random.randint(5, 30),
+            'volume': random.randint(0, 100),
+            'notifications': True
+        })
+
+    def monitoring_status(self):
+        self.request('GET', '/api/monitoring/status', '/api/monitoring/status')
+
+    def calibrate(self):
+        posture = 'bad' if 'good' in self.calibrated else 'good'
+        status, session = self.request('POST', f'/api/calibrate/{posture}', f'/api/calibrate/{posture}', {
+            'samples': self.options.calibration_samples
+        })
+        if status != 202:
+            return
+
+        if self.options.follow == 'sse':
+            session = self.subscribe(session['session_id'])
+        else:
+            session = self.poll(session['session_id'])
+
+        if session and session['status'] == 'completed':
+            self.calibrated.add(posture)
+
+    def follow_deadline(self):
+        return time.time() + self.options.request_timeout + self.options.calibration_samples * 0.2 + 10
+
+    def poll(self, session_id):
+        """Follow a calibration session by polling it, returning its last state"""
+        deadline = self.follow_deadline()
+        session = None
+        while time.time() < deadline:
+            time.sleep(0.5)
+            status, session = self.request('GET', f'/api/calibrate/sessions/{session_id}', '/api/calibrate/sessions/<id>')
+            if status != 200:
+                return None
+            if session['finished_at']:
+                break
+        return session
+
+    def subscribe(self, session_id):
+        """Follow a calibration session over its SSE stream as the dashboard does, returning its last state"""
+        status, session = self.request('GET', f'/api/calibrate/sessions/{session_id}', '/api/calibrate/sessions/<id>')
+        if status != 200:
+            return None
+
+        # Recorded latency is the time to the first event; the stream stays open until the session finishes
+        endpoint = 'GET /api/calibrate/sessions/<id>/stream'
+        stream_token = urllib.parse.quote(session['stream_token'])
+        url = f'{self.base_url}/api/calibrate/sessions/{session_id}/stream?stream_token={stream_token}'
+        started_at = time.perf_counter()
+        first_event = True
+        deadline = self.follow_deadline()
+        try:
+            with urllib.request.urlopen(url, timeout=self.options.request_timeout) as response:
+                for raw_line in response:
+                    line = raw_line.decode('utf-8').strip()
+                    if not line.startswith('data: '):
+                        if time.time() > deadline:
+                            break
+                        continue
+                    if first_event:
+                        self.stats.record(endpoint, response.status, time.perf_counter() - started_at)
+                        first_event = False
+                    session = json.loads(line[len('data: '):])
+                    if session['finished_at'] or time.time() > deadline:
+                        break
+        except urllib.error.HTTPError as e:
+            self.stats.record(endpoint, e.code, time.perf_counter() - started_at)
+            return None
+        except (urllib.error.URLError, OSError, json.JSONDecodeError):
+            if first_event:
+                self.stats.record(endpoint, 0, time.perf_counter() - started_at)
+            return None
+        return session
+
+    def monitoring_cycle(self):
+        if self.calibrated != {'good', 'bad'}:
+            self.calibrate()
+            return
+        status, _ = self.request('POST', '/api/monitoring/start', '/api/monitoring/start', {})
+        if status == 200:
+            time.sleep(self.options.monitoring_hold)
+            self.request('POST', '/api/monitoring/stop', '/api/monitoring/stop', {})
+
+    def run(self, deadline):
+        """Run the mixed workload until the deadline"""
+        actions = [
+            (self.monitoring_status, 40),
+            (self.get_settings, 25),
+            (self.update_settings, 10),
+            (self.login, 10),
+            (self.calibrate, self.options.calibration_weight),
+            (self.monitoring_cycle, self.options.monitoring_weight)
+        ]
+        functions = [action for action, _ in actions]
+        weights = [weight for _, weight in actions]
+
+        while time.time() < deadline:
+            random.choices(functions, weights)[0]()
+            time.sleep(random.expovariate(1 / self.options.think_time) if self.options.think_time else 0)
+
+def prepare_workspace():
+    """Temporary working directory laid out like the repository root, so app.py's
+    relative backend/ paths resolve there instead of touching real data"""
+    workspace = tempfile.mkdtemp(prefix='spineguard_load_')
+    os.makedirs(os.path.join(workspace, 'backend', 'data'))
+    os.makedirs(os.path.join(workspace, 'backend', 'models'))
+    os.symlink(os.path.join(BACKEND_DIR, 'scripts'), os.path.join(workspace, 'backend', 'scripts'))
+    return workspace
+
+def start_server(mongo_uri, threads):
+    """Import app.py, point it at the test database and serve it on a free port"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+    from werkzeug.serving import BaseWSGIServer, make_server
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Serves requests on a fixed pool of threads, like gunicorn's gthread workers,
+        instead of werkzeug's thread per request"""
+
+        def __init__(self, host, port, app, threads):
+            super().__init__(host, port, app)
+            self.executor = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.executor.submit(self.handle_request_in_pool, request, client_address)
+
+        def handle_request_in_pool(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    # Per-request log lines would drown out the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    if mongo_uri:
+        import pymongo
+        app_module.mongo.db = pymongo.MongoClient(mongo_uri).get_default_database()
+    else:
+        import mongomock
+        app_module.mongo.db = mongomock.MongoClient().spineguard
+
+    if threads:
+        server = PooledWSGIServer('127.0.0.1', 0, app_module.app, threads)
+    else:
+        server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+    return app_module, server, f'http://127.0.0.1:{server.server_port}'
+
+def stop_background_work(app_module):
+    """Terminate calibration and prediction processes still running after the test"""
+    processes = list(app_module.calibration_processes.values())
+    processes.append(app_module.monitoring_state['process'])
+    for process in processes:
+        if process and process.poll() is None:
+            process.terminate()
+            process.wait()
+
+def print_report(results, elapsed, users):
+    print(f"\nLoad test: {users} users for {elapsed:.1f}s\n")
+    header = f"{'endpoint':<42}{'reqs':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'5xx':>8}{'4xx':>8}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, result in results.items():
+        print(f"{endpoint:<42}{result['requests']:>7}{result['throughput_rps']:>9.2f}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['error_rate']:>8.1%}{result['client_error_rate']:>8.1%}")
+
+def run_workload(base_url, args):
+    """Register the synthetic users and run the mixed workload against base_url"""
+    stats = LoadStats()
+    users = [SyntheticUser(i, base_url, stats, args) for i in range(args.users)]
+
+    print(f"Registering {args.users} users...")
+    users = [user for user in users if user.register()]
+    if not users:
+        print("No users could be registered")
+        exit(1)
+
+    print(f"Running mixed workload for {args.duration:.0f}s...")
+    started_at = time.time()
+    deadline = started_at + args.duration
+    threads = [threading.Thread(target=user.run, args=(deadline,)) for user in users]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=max(0.0, deadline - time.time()) + args.request_timeout + 30)
+    elapsed = time.time() - started_at
+
+    results = stats.summary(elapsed)
+    print_report(results, elapsed, len(users))
+    return {'users': len(users), 'elapsed_s': elapsed, 'endpoints': results}
+
+def main():
+    parser = argparse.ArgumentParser(description='SpineGuard API Load Test')
+    parser.add_argument('--users', type=int, default=20, help='Number of synthetic users (default: 20)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run the workload (default: 30)')
+    parser.add_argument('--think_time', type=float, default=0.2,
+                        help='Mean pause between a user\'s requests in seconds (default: 0.2)')
+    parser.add_argument('--calibration_samples', type=int, default=20,
+                        help='Samples per calibration request (default: 20)')
+    parser.add_argument('--calibration_weight', type=int, default=3,
+                        help='Relative weight of calibration in the workload mix (default: 3)')
+    parser.add_argument('--follow', choices=['sse', 'poll'], default='sse',
+                        help='Follow calibration progress over the SSE stream or by polling (default: sse)')
+    parser.add_argument('--monitoring_weight', type=int, default=2,
+                        help='Relative weight of monitoring start/stop in the workload mix (default: 2)')
+    parser.add_argument('--monitoring_hold', type=float, default=2.0,
+                        help='Seconds to keep monitoring running before stopping (default: 2)')
+    parser.add_argument('--request_timeout', type=float, default=60.0,
+                        help='Per-request timeout in seconds (default: 60)')
+    parser.add_argument('--mongo_uri', default=None,
+                        help='Use a local mongod at this URI instead of mongomock')
+    parser.add_argument('--server_threads', type=int, default=16,
+                        help='Request threads for the in-process server; 0 starts one per request (default: 16)')
+    parser.add_argument('--base_url', default=None,
+                        help='Load test an already running server (e.g. gunicorn) instead of starting one')
+    parser.add_argument('--output', default=None, help='Also write the results as JSON to this file')
+
+    args = parser.parse_args()
+
+    if args.base_url:
+        report = run_workload(args.base_url.rstrip('/'), args)
+    else:
+        report = run_in_process(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+def run_in_process(args):
+    """Serve app.py from a scratch workspace with a fake serial device and load test it"""
+    original_cwd = os.getcwd()
+    workspace = prepare_workspace()
+    device = FakeSerialDevice()
+    os.environ['SPINEGUARD_SERIAL_PORT'] = device.port
+    app_module = None
+
+    try:
+        os.chdir(workspace)
+        device.start()
+        app_module, server, base_url = start_server(args.mongo_uri, args.server_threads)
+        print(f"Serving app on {base_url}, fake serial device on {device.port}")
+
+        report = run_workload(base_url, args)
+        server.shutdown()
+        return report
+
+    finally:
+        if app_module:
+            stop_background_work(app_module)
+        os.chdir(original_cwd)
+        device.stop()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -7,14 +7,20 @@ Continuously reads sensor data and predicts posture in real-time
 import serial
 import joblib
 import numpy as np
+import copy
 import time
 import argparse
 import json
 import os
 from datetime import datetime
 
+# Cheaper prediction paths, each adding to the ones before it
+DEGRADATION_LEVELS = ['full', 'reduced_trees', 'decimate', 'batch']
+
 class LivePosturePredictor:
-    def __init__(self, user_id, port='COM3', baudrate=9600):
+    def __init__(self, user_id, port='COM3', baudrate=9600, emit_mode='every',
+                 confidence_delta=0.15, heartbeat_interval=5.0, sensor_data_mode='full',
+                 latency_budget_ms=None):
         self.user_id = user_id
         self.port = port
         self.baudrate = baudrate
@@ -28,6 +34,39 @@ class LivePosturePredictor:
         self.buffer_size = 5
         self.bad_posture_threshold = 0.6  # 60% of recent predictions must be bad
         
+        # Emission policy: 'every' frame, or only on 'changes' (posture transition,
+        # confidence moving by confidence_delta, or heartbeat_interval seconds of silence)
+        self.emit_mode = emit_mode
+        self.confidence_delta = confidence_delta
+        self.heartbeat_interval = heartbeat_interval
+        self.sensor_data_mode = sensor_data_mode  # 'full', 'summary' or 'none'
+        self.last_emitted = None
+        self.last_emit_time = 0.0
+        self.frames_since_emit = 0
+        self.sensor_sum = None
+        
+        # Latency budget: when a cycle's work per sensor frame exceeds latency_budget_ms,
+        # or unread frames pile up on the port, the predictor steps down
+        # DEGRADATION_LEVELS, and steps back up once the lighter level would fit again
+        self.latency_budget_ms = latency_budget_ms
+        self.level_costs = {}  # Smoothed ms of work per sensor frame at each level
+        self.level_ratios = {}  # Cost of the level above relative to this one, when first measured
+        self.cost_smoothing = 0.2
+        self.recovery_margin = 0.8  # Recover only if the lighter level would use under 80% of budget
+        self.min_cycles_at_level = 10
+        self.cycles_at_level = 0
+        self.backlog_limit = 5  # Unread frames on the port before predictions count as stale
+        self.bytes_per_frame = None
+        self.read_wait = 0.0  # Seconds the last read spent blocked waiting for the device
+        self.degradation_level = 0
+        self.reduced_model = None
+        self.reduced_tree_fraction = 0.25
+        self.decimation_factor = 2
+        self.max_batch_frames = 50
+        self.frame_interval = 0.1
+        self.frame_counter = 0
+        self.running = False
+        
     def load_model(self):
         """Load the trained model and scaler"""
         models_dir = 'models'
@@ -42,6 +81,7 @@ class LivePosturePredictor:
         
         self.model = joblib.load(model_filename)
         self.scaler = joblib.load(scaler_filename)
+        self.reduced_model = self.build_reduced_model()
         
         print(f"Model loaded from {model_filename}")
         print(f"Scaler loaded from {scaler_filename}")
@@ -51,6 +91,8 @@ class LivePosturePredictor:
         try:
             self.serial_connection = serial.Serial(self.port, self.baudrate, timeout=1)
             time.sleep(2)  # Wait for Arduino to initialize
+            # Frames sent while waiting are stale and would read as a backlog
+            self.serial_connection.reset_input_buffer()
             print(f"Connected to {self.port} at {self.baudrate} baud")
             return True
         except serial.SerialException as e:
@@ -69,7 +111,14 @@ class LivePosturePredictor:
             return None
         
         try:
-            line = self.serial_connection.readline().decode('utf-8').strip()
+            raw_line = self.serial_connection.readline()
+            if raw_line:
+                # Average line length converts the port's byte backlog into frames
+                if self.bytes_per_frame is None:
+                    self.bytes_per_frame = len(raw_line)
+                else:
+                    self.bytes_per_frame += 0.1 * (len(raw_line) - self.bytes_per_frame)
+            line = raw_line.decode('utf-8').strip()
             if line:
                 # Expected format: "ax,ay,az,gx,gy,gz"
                 data = line.split(',')
@@ -80,34 +129,128 @@ class LivePosturePredictor:
             print(f"Error reading data: {e}")
             return None
     
+    def build_reduced_model(self):
+        """Copy of the forest that votes with only a subset of its trees"""
+        estimators = getattr(self.model, 'estimators_', None)
+        if not estimators:
+            return None
+        
+        tree_count = max(1, int(len(estimators) * self.reduced_tree_fraction))
+        reduced_model = copy.copy(self.model)
+        reduced_model.estimators_ = estimators[:tree_count]
+        reduced_model.n_estimators = tree_count
+        return reduced_model
+    
     def predict_posture(self, sensor_data):
         """Predict posture from sensor data"""
+        predictions = self.predict_batch([sensor_data])
+        return predictions[0] if predictions else None
+    
+    def predict_batch(self, rows):
+        """Predict posture for several sensor readings in one model call"""
         if self.model is None or self.scaler is None:
             return None
         
-        # Reshape data for prediction
-        data_array = np.array(sensor_data).reshape(1, -1)
-        
         # Scale the data
-        scaled_data = self.scaler.transform(data_array)
+        scaled_data = self.scaler.transform(np.array(rows))
         
-        # Make prediction
-        prediction = self.model.predict(scaled_data)[0]
-        probability = self.model.predict_proba(scaled_data)[0]
+        # Fewer trees once the latency budget has been exceeded
+        model = self.model
+        if self.degradation_level >= 1 and self.reduced_model is not None:
+            model = self.reduced_model
         
-        # Convert prediction to label
-        posture_label = 'bad' if prediction == 1 else 'good'
-        confidence = max(probability)
+        # The predicted class is the most probable one, so one call gives both
+        probabilities = model.predict_proba(scaled_data)
         
-        return {
-            'posture': posture_label,
-            'confidence': confidence,
-            'raw_prediction': int(prediction),
-            'probabilities': {
-                'good': probability[0],
-                'bad': probability[1]
-            }
-        }
+        predictions = []
+        for probability in probabilities:
+            prediction = int(np.argmax(probability))
+            
+            # Convert prediction to label
+            posture_label = 'bad' if prediction == 1 else 'good'
+            confidence = max(probability)
+            
+            predictions.append({
+                'posture': posture_label,
+                'confidence': confidence,
+                'raw_prediction': prediction,
+                'probabilities': {
+                    'good': probability[0],
+                    'bad': probability[1]
+                }
+            })
+        
+        return predictions
+    
+    def read_frames(self):
+        """Read the next frame, or everything waiting on the port when in batch mode"""
+        read_started = time.perf_counter()
+        sensor_data = self.read_sensor_data()
+        self.read_wait = time.perf_counter() - read_started
+        frames = [sensor_data] if sensor_data else []
+        
+        if self.degradation_level >= 3:
+            # Drain the backlog so predictions catch up with the wearer
+            while len(frames) < self.max_batch_frames and self.serial_connection.in_waiting:
+                sensor_data = self.read_sensor_data()
+                if sensor_data:
+                    frames.append(sensor_data)
+        
+        return frames
+    
+    def select_frames(self, frames):
+        """Drop frames according to the decimation rate when degraded"""
+        if self.degradation_level < 2:
+            self.frame_counter += len(frames)
+            return frames
+        
+        selected = []
+        for frame in frames:
+            self.frame_counter += 1
+            if self.frame_counter % self.decimation_factor == 0:
+                selected.append(frame)
+        
+        # Always keep the newest frame in a batch so the posture stays current
+        if len(frames) > 1 and frames[-1] not in selected:
+            selected.append(frames[-1])
+        return selected
+    
+    def backlog_frames(self):
+        """Frames waiting unread on the serial port"""
+        if not self.serial_connection or not self.bytes_per_frame:
+            return 0
+        return int(self.serial_connection.in_waiting / self.bytes_per_frame)
+    
+    def set_degradation_level(self, level):
+        self.degradation_level = level
+        self.cycles_at_level = 0
+    
+    def record_cycle(self, work_ms, frames_read, backlog):
+        """Track the cost of a loop cycle and adjust the degradation level"""
+        if not self.latency_budget_ms or not frames_read:
+            return
+        
+        # Work per frame read off the port, so skipped and batched frames lower it too
+        level = self.degradation_level
+        cost = work_ms / frames_read
+        previous = self.level_costs.get(level)
+        self.level_costs[level] = cost if previous is None else previous + self.cost_smoothing * (cost - previous)
+        self.cycles_at_level += 1
+        if self.cycles_at_level < self.min_cycles_at_level:
+            return
+        
+        if level > 0 and level not in self.level_ratios and self.level_costs.get(level - 1):
+            self.level_ratios[level] = self.level_costs[level - 1] / max(self.level_costs[level], 1e-6)
+        
+        lagging = backlog > self.backlog_limit
+        if (lagging or self.level_costs[level] > self.latency_budget_ms) and level < len(DEGRADATION_LEVELS) - 1:
+            self.set_degradation_level(level + 1)
+        elif level > 0 and not lagging:
+            # Estimate what the lighter level would cost under the current load, so a
+            # level that was over budget is not retried until it would actually fit
+            recovery_cost = self.level_costs[level] * self.level_ratios.get(level, 1.0)
+            if recovery_cost < self.latency_budget_ms * self.recovery_margin:
+                self.set_degradation_level(level - 1)
     
     def smooth_predictions(self, prediction):
         """Apply smoothing to predictions to reduce noise"""
@@ -132,6 +275,63 @@ class LivePosturePredictor:
             'smoothing_ratio': sum(self.prediction_buffer) / len(self.prediction_buffer) if self.prediction_buffer else 0
         }
     
+    def should_emit(self, smoothed_prediction, now):
+        """Decide whether this frame is worth sending upstream"""
+        if self.emit_mode == 'every' or self.last_emitted is None:
+            return True
+        if smoothed_prediction['posture'] != self.last_emitted['posture']:
+            return True
+        if abs(smoothed_prediction['confidence'] - self.last_emitted['confidence']) >= self.confidence_delta:
+            return True
+        return now - self.last_emit_time >= self.heartbeat_interval
+    
+    def accumulate_sensor_data(self, sensor_data):
+        """Track sensor readings since the last emission for the summary"""
+        self.frames_since_emit += 1
+        if self.sensor_data_mode != 'summary':
+            return
+        if self.sensor_sum is None:
+            self.sensor_sum = list(sensor_data)
+        else:
+            self.sensor_sum = [total + value for total, value in zip(self.sensor_sum, sensor_data)]
+    
+    def build_output(self, sensor_data, smoothed_prediction, now):
+        """Build the JSON document for an emitted frame"""
+        output_data = {
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'posture': smoothed_prediction['posture'],
+            'confidence': round(float(smoothed_prediction['confidence']), 3),
+            'raw_posture': smoothed_prediction['raw_posture'],
+            'smoothing_ratio': round(smoothed_prediction['smoothing_ratio'], 3)
+        }
+        
+        if self.sensor_data_mode == 'full':
+            output_data['sensor_data'] = sensor_data
+        elif self.sensor_data_mode == 'summary':
+            # Mean of each axis over the frames folded into this emission
+            output_data['sensor_mean'] = [round(total / self.frames_since_emit, 3) for total in self.sensor_sum]
+        
+        if self.emit_mode != 'every':
+            output_data['frames'] = self.frames_since_emit
+        
+        if self.latency_budget_ms:
+            output_data['degradation'] = DEGRADATION_LEVELS[self.degradation_level]
+            if self.degradation_level in self.level_costs:
+                output_data['latency_ms'] = round(self.level_costs[self.degradation_level], 2)
+        
+        return output_data
+    
+    def mark_emitted(self, smoothed_prediction, now):
+        """Reset the emission window after a frame has been sent"""
+        self.last_emitted = smoothed_prediction
+        self.last_emit_time = now
+        self.frames_since_emit = 0
+        self.sensor_sum = None
+    
+    def stop(self):
+        """Ask the monitoring loop to finish after its current cycle"""
+        self.running = False
+    
     def start_monitoring(self):
         """Start live posture monitoring"""
         print("Starting live posture monitoring...")
@@ -140,33 +340,46 @@ class LivePosturePredictor:
         if not self.connect_serial():
             return False
         
+        self.running = True
         try:
-            while True:
+            while self.running:
+                cycle_started = time.perf_counter()
+                
                 # Read sensor data
-                sensor_data = self.read_sensor_data()
+                frames_read = self.read_frames()
+                frames = self.select_frames(frames_read)
                 
-                if sensor_data:
-                    # Make prediction
-                    prediction = self.predict_posture(sensor_data)
+                if frames:
+                    # Make predictions
+                    predictions = self.predict_batch(frames)
                     
-                    if prediction:
+                    if predictions:
                         # Apply smoothing
-                        smoothed_prediction = self.smooth_predictions(prediction)
+                        for sensor_data, prediction in zip(frames, predictions):
+                            smoothed_prediction = self.smooth_predictions(prediction)
+                            self.accumulate_sensor_data(sensor_data)
                         
-                        # Create output data
-                        output_data = {
-                            'timestamp': datetime.now().isoformat(),
-                            'sensor_data': sensor_data,
-                            'posture': smoothed_prediction['posture'],
-                            'confidence': smoothed_prediction['confidence'],
-                            'raw_posture': smoothed_prediction['raw_posture'],
-                            'smoothing_ratio': smoothed_prediction['smoothing_ratio']
-                        }
+                        now = time.time()
                         
-                        # Output as JSON for the Flask app to read
-                        print(json.dumps(output_data), flush=True)
+                        if self.should_emit(smoothed_prediction, now):
+                            output_data = self.build_output(sensor_data, smoothed_prediction, now)
+                            
+                            # Output as compact JSON for the Flask app to read
+                            print(json.dumps(output_data, separators=(',', ':')), flush=True)
+                            
+                            self.mark_emitted(smoothed_prediction, now)
+                
+                # Waiting for the device is idle time, so only decoding, prediction and
+                # emission count against the budget; lag shows up in the backlog instead
+                cycle_time = time.perf_counter() - cycle_started
+                work_time = max(0.0, cycle_time - self.read_wait)
+                backlog = self.backlog_frames()
+                self.record_cycle(work_time * 1000, len(frames_read), backlog)
                 
-                time.sleep(0.1)  # Small delay between readings
+                # Small delay between readings, shortened by the time this cycle took,
+                # and skipped while frames are waiting so the loop catches up
+                if not backlog:
+                    time.sleep(max(0.0, self.frame_interval - cycle_time))
                 
         except KeyboardInterrupt:
             print("\nMonitoring stopped by user")
@@ -182,11 +395,28 @@ def main():
     parser.add_argument('--user_id', required=True, help='User ID for model loading')
     parser.add_argument('--port', default='COM3', help='Serial port (default: COM3)')
     parser.add_argument('--baudrate', type=int, default=9600, help='Baud rate (default: 9600)')
+    parser.add_argument('--emit', choices=['every', 'changes'], default='every',
+                        help='Emit every frame, or only on posture/confidence changes and heartbeats (default: every)')
+    parser.add_argument('--confidence_delta', type=float, default=0.15,
+                        help='Confidence change that triggers an emission in changes mode (default: 0.15)')
+    parser.add_argument('--heartbeat', type=float, default=5.0,
+                        help='Seconds between heartbeat emissions in changes mode (default: 5.0)')
+    parser.add_argument('--sensor_data', choices=['full', 'summary', 'none'], default='full',
+                        help='Include raw sensor data, a per-axis mean, or nothing (default: full)')
+    parser.add_argument('--latency_budget_ms', type=float, default=50.0,
+                        help='Processing budget per sensor frame before degrading to cheaper prediction; 0 disables (default: 50)')
     
     args = parser.parse_args()
     
     try:
-        predictor = LivePosturePredictor(args.user_id, args.port, args.baudrate)
+        predictor = LivePosturePredictor(
+            args.user_id, args.port, args.baudrate,
+            emit_mode=args.emit,
+            confidence_delta=args.confidence_delta,
+            heartbeat_interval=args.heartbeat,
+            sensor_data_mode=args.sensor_data,
+            latency_budget_ms=args.latency_budget_ms
+        )
         
         # Load the trained model
         predictor.load_model()
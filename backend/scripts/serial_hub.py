@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Serial Hub for SpineGuard Posture Monitoring
+Reads many sensor ports from one thread and runs batched posture prediction
+(ports are multiplexed with selectors, so this requires POSIX serial devices)
+"""
+
+import serial
+import selectors
+import numpy as np
+import time
+import argparse
+import json
+from collections import deque
+
+from predict_live import LivePosturePredictor
+
+class SensorDevice:
+    def __init__(self, port, user_id, baudrate=9600, max_buffered_frames=50):
+        self.port = port
+        self.user_id = user_id
+        self.baudrate = baudrate
+        self.serial_connection = None
+        self.buffer = bytearray()
+        # Oldest frames are dropped if inference falls behind, so alerts stay current
+        self.frames = deque(maxlen=max_buffered_frames)
+        self.dropped_frames = 0
+        self.predictor = None
+
+    def connect(self):
+        """Open the serial port in non-blocking mode"""
+        try:
+            self.serial_connection = serial.Serial(self.port, self.baudrate, timeout=0)
+            print(f"Connected to {self.port} at {self.baudrate} baud")
+            return True
+        except serial.SerialException as e:
+            print(f"Failed to connect to {self.port}: {e}")
+            return False
+
+    def disconnect(self):
+        """Disconnect from the serial port"""
+        if self.serial_connection and self.serial_connection.is_open:
+            self.serial_connection.close()
+            print(f"Serial connection to {self.port} closed")
+
+    def read_available(self):
+        """Read whatever bytes are waiting and decode complete lines into frames"""
+        try:
+            chunk = self.serial_connection.read(self.serial_connection.in_waiting or 1)
+        except serial.SerialException as e:
+            print(f"Error reading {self.port}: {e}")
+            return False
+
+        if not chunk:
+            return True
+
+        self.buffer.extend(chunk)
+        *lines, remainder = self.buffer.split(b'\n')
+        self.buffer = bytearray(remainder)
+
+        for raw_line in lines:
+            frame = self.parse_line(raw_line)
+            if frame is None:
+                continue
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped_frames += 1
+            self.frames.append(frame)
+
+        return True
+
+    def parse_line(self, raw_line):
+        """Parse one "ax,ay,az,gx,gy,gz" line, returning None if it is malformed"""
+        try:
+            data = raw_line.decode('utf-8').strip().split(',')
+            if len(data) == 6:
+                return [float(x) for x in data]
+        except (UnicodeDecodeError, ValueError):
+            pass
+        return None
+
+class SerialHub:
+    def __init__(self, batch_interval=0.1, predictor_options=None):
+        self.devices = []
+        self.selector = selectors.DefaultSelector()
+        self.batch_interval = batch_interval
+        self.predictor_options = predictor_options or {}
+        self.models = {}  # user_id -> (model, scaler), shared by that user's devices
+
+    def add_device(self, device):
+        """Register a device and prepare its predictor"""
+        predictor = LivePosturePredictor(device.user_id, device.port, device.baudrate, **self.predictor_options)
+
+        if device.user_id not in self.models:
+            predictor.load_model()
+            self.models[device.user_id] = (predictor.model, predictor.scaler)
+        predictor.model, predictor.scaler = self.models[device.user_id]
+
+        device.predictor = predictor
+        self.devices.append(device)
+
+    def open(self):
+        """Connect every device and register its file descriptor with the selector"""
+        connected = []
+        for device in self.devices:
+            if device.connect():
+                self.selector.register(device.serial_connection.fileno(), selectors.EVENT_READ, device)
+                connected.append(device)
+
+        if connected:
+            time.sleep(2)  # Wait for the Arduinos to initialize
+        self.devices = connected
+        return bool(connected)
+
+    def close(self):
+        """Disconnect all devices"""
+        for device in self.devices:
+            try:
+                self.selector.unregister(device.serial_connection.fileno())
+            except (KeyError, ValueError):
+                pass
+            device.disconnect()
+        self.selector.close()
+
+    def run_inference(self):
+        """Predict every pending frame, one model call per user"""
+        pending = {}
+        for device in self.devices:
+            if device.frames:
+                pending.setdefault(device.user_id, []).append((device, list(device.frames)))
+                device.frames.clear()
+
+        for user_id, device_frames in pending.items():
+            model, scaler = self.models[user_id]
+            rows = [frame for _, frames in device_frames for frame in frames]
+            scaled_data = scaler.transform(np.array(rows))
+            probabilities = model.predict_proba(scaled_data)
+
+            offset = 0
+            for device, frames in device_frames:
+                device_probabilities = probabilities[offset:offset + len(frames)]
+                offset += len(frames)
+                self.handle_predictions(device, frames, device_probabilities)
+
+    def handle_predictions(self, device, frames, probabilities):
+        """Smooth a device's predictions and emit according to its policy"""
+        predictor = device.predictor
+        smoothed_prediction = None
+
+        for frame, probability in zip(frames, probabilities):
+            raw_prediction = int(np.argmax(probability))
+            prediction = {
+                'posture': 'bad' if raw_prediction == 1 else 'good',
+                'confidence': float(max(probability)),
+                'raw_prediction': raw_prediction
+            }
+            smoothed_prediction = predictor.smooth_predictions(prediction)
+            predictor.accumulate_sensor_data(frame)
+
+        now = time.time()
+        if predictor.should_emit(smoothed_prediction, now):
+            output_data = predictor.build_output(frames[-1], smoothed_prediction, now)
+            output_data['device'] = device.port
+            output_data['user_id'] = device.user_id
+            if device.dropped_frames:
+                output_data['dropped'] = device.dropped_frames
+
+            print(json.dumps(output_data, separators=(',', ':')), flush=True)
+
+            predictor.mark_emitted(smoothed_prediction, now)
+
+    def start_monitoring(self):
+        """Multiplex all ports on one thread and run batched inference"""
+        print("Starting serial hub monitoring...")
+        print("Press Ctrl+C to stop")
+
+        if not self.open():
+            print("No devices could be connected")
+            return False
+
+        next_batch = time.time() + self.batch_interval
+
+        try:
+            while self.devices:
+                timeout = max(0.0, next_batch - time.time())
+                for key, _ in self.selector.select(timeout):
+                    device = key.data
+                    if not device.read_available():
+                        # Stop watching a port that failed
+                        self.selector.unregister(key.fd)
+                        device.disconnect()
+                        self.devices.remove(device)
+
+                if time.time() >= next_batch:
+                    self.run_inference()
+                    next_batch = time.time() + self.batch_interval
+
+        except KeyboardInterrupt:
+            print("\nMonitoring stopped by user")
+        except Exception as e:
+            print(f"Error during monitoring: {e}")
+        finally:
+            self.close()
+
+        return True
+
+def parse_device(value):
+    """Parse a PORT=USER_ID device argument"""
+    port, separator, user_id = value.rpartition('=')
+    if not separator or not port or not user_id:
+        raise argparse.ArgumentTypeError(f"Expected PORT=USER_ID, got {value!r}")
+    return port, user_id
+
+def main():
+    parser = argparse.ArgumentParser(description='SpineGuard Multi-Device Serial Hub')
+    parser.add_argument('--device', type=parse_device, action='append', required=True,
+                        help='Sensor port and its user as PORT=USER_ID (repeat for each device)')
+    parser.add_argument('--baudrate', type=int, default=9600, help='Baud rate (default: 9600)')
+    parser.add_argument('--batch_interval', type=float, default=0.1,
+                        help='Seconds between batched inference runs (default: 0.1)')
+    parser.add_argument('--emit', choices=['every', 'changes'], default='changes',
+                        help='Emit every batch, or only on posture/confidence changes and heartbeats (default: changes)')
+    parser.add_argument('--confidence_delta', type=float, default=0.15,
+                        help='Confidence change that triggers an emission in changes mode (default: 0.15)')
+    parser.add_argument('--heartbeat', type=float, default=5.0,
+                        help='Seconds between heartbeat emissions in changes mode (default: 5.0)')
+    parser.add_argument('--sensor_data', choices=['full', 'summary', 'none'], default='none',
+                        help='Include raw sensor data, a per-axis mean, or nothing (default: none)')
+
+    args = parser.parse_args()
+
+    try:
+        hub = SerialHub(
+            batch_interval=args.batch_interval,
+            predictor_options={
+                'emit_mode': args.emit,
+                'confidence_delta': args.confidence_delta,
+                'heartbeat_interval': args.heartbeat,
+                'sensor_data_mode': args.sensor_data
+            }
+        )
+
+        for port, user_id in args.device:
+            hub.add_device(SensorDevice(port, user_id, args.baudrate))
+
+        hub.start_monitoring()
+
+    except Exception as e:
+        print(f"Error: {e}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -9,23 +9,27 @@ import csv
 import time
 import argparse
 import os
+import json
+import signal
 from datetime import datetime
 
 class SerialReader:
-    def __init__(self, port='COM3', baudrate=9600):
+    def __init__(self, port='COM3', baudrate=9600, progress_format='text'):
         self.port = port
         self.baudrate = baudrate
         self.serial_connection = None
+        self.progress_format = progress_format
+        self.dropped_samples = 0
         
     def connect(self):
         """Connect to the serial port"""
         try:
             self.serial_connection = serial.Serial(self.port, self.baudrate, timeout=1)
             time.sleep(2)  # Wait for Arduino to initialize
-            print(f"Connected to {self.port} at {self.baudrate} baud")
+            self.report('connected', f"Connected to {self.port} at {self.baudrate} baud", port=self.port)
             return True
         except serial.SerialException as e:
-            print(f"Failed to connect to {self.port}: {e}")
+            self.report('error', f"Failed to connect to {self.port}: {e}", error=str(e))
             return False
     
     def disconnect(self):
@@ -46,11 +50,24 @@ class SerialReader:
                 data = line.split(',')
                 if len(data) == 6:
                     return [float(x) for x in data]
+                self.dropped_samples += 1
             return None
         except (UnicodeDecodeError, ValueError) as e:
-            print(f"Error reading data: {e}")
+            self.dropped_samples += 1
+            if self.progress_format == 'text':
+                print(f"Error reading data: {e}")
             return None
     
+    def report(self, event, message=None, **fields):
+        """Report calibration progress as plain text or as a JSON line"""
+        if self.progress_format == 'json':
+            fields['event'] = event
+            if message:
+                fields['message'] = message
+            print(json.dumps(fields), flush=True)
+        elif message:
+            print(message, flush=True)
+    
     def calibrate_posture(self, mode, samples, user_id):
         """Collect calibration data for good or bad posture"""
         if not self.connect():
@@ -68,24 +85,30 @@ class SerialReader:
             filename = f'{data_dir}/bad_posture_{user_id}.csv'
             posture_type = 'bad'
         else:
-            print(f"Invalid mode: {mode}")
+            self.report('error', f"Invalid mode: {mode}", error='invalid_mode')
             return False
         
-        print(f"Starting {posture_type} posture calibration...")
-        print(f"Please maintain {posture_type} posture for {samples} samples")
-        print("Calibration will start in 3 seconds...")
+        self.report('starting', f"Starting {posture_type} posture calibration...",
+                    posture=posture_type, target=samples)
+        self.report('info', f"Please maintain {posture_type} posture for {samples} samples")
+        self.report('info', "Calibration will start in 3 seconds...")
         
         # Countdown
         for i in range(3, 0, -1):
-            print(f"{i}...")
+            self.report('countdown', f"{i}...", seconds=i)
             time.sleep(1)
         
-        print("Calibration started!")
+        self.report('started', "Calibration started!")
         
         collected_samples = 0
+        self.dropped_samples = 0
+        started_at = time.time()
+        # Write to a temporary file so a cancelled run never clobbers previous data
+        temp_filename = f'{filename}.part'
+        completed = False
         
         try:
-            with open(filename, 'w', newline='') as csvfile:
+            with open(temp_filename, 'w', newline='') as csvfile:
                 writer = csv.writer(csvfile)
                 # Write header
                 writer.writerow(['ax', 'ay', 'az', 'gx', 'gy', 'gz', 'label', 'timestamp'])
@@ -99,24 +122,45 @@ class SerialReader:
                         collected_samples += 1
                         
                         # Progress indicator
-                        if collected_samples % 10 == 0:
+                        if collected_samples % 10 == 0 or collected_samples == samples:
                             progress = (collected_samples / samples) * 100
-                            print(f"Progress: {progress:.1f}% ({collected_samples}/{samples})")
+                            elapsed = time.time() - started_at
+                            self.report(
+                                'progress',
+                                f"Progress: {progress:.1f}% ({collected_samples}/{samples})",
+                                collected=collected_samples,
+                                target=samples,
+                                progress=round(progress, 1),
+                                rate=round(collected_samples / elapsed, 2) if elapsed > 0 else 0.0,
+                                dropped=self.dropped_samples
+                            )
                     
                     time.sleep(0.1)  # Small delay between readings
+            
+            os.replace(temp_filename, filename)
+            completed = True
         
         except KeyboardInterrupt:
-            print("\nCalibration interrupted by user")
+            self.report('cancelled', "\nCalibration interrupted by user",
+                        collected=collected_samples, dropped=self.dropped_samples)
             return False
         except Exception as e:
-            print(f"Error during calibration: {e}")
+            self.report('error', f"Error during calibration: {e}", error=str(e))
             return False
         finally:
             self.disconnect()
+            if not completed and os.path.exists(temp_filename):
+                os.remove(temp_filename)
         
-        print(f"\nCalibration completed! {collected_samples} samples saved to {filename}")
+        self.report('completed', f"\nCalibration completed! {collected_samples} samples saved to {filename}",
+                    collected=collected_samples, target=samples,
+                    dropped=self.dropped_samples, data_file=filename)
         return True
 
+def handle_termination(signum, frame):
+    """Raise KeyboardInterrupt when the process is asked to terminate"""
+    raise KeyboardInterrupt()
+
 def main():
     parser = argparse.ArgumentParser(description='SpineGuard Serial Reader')
     parser.add_argument('--mode', choices=['calibrate_good', 'calibrate_bad'], 
@@ -129,10 +173,15 @@ def main():
                        help='Serial port (default: COM3)')
     parser.add_argument('--baudrate', type=int, default=9600, 
                        help='Baud rate (default: 9600)')
+    parser.add_argument('--progress', choices=['text', 'json'], default='text',
+                       help='Progress output format (default: text)')
     
     args = parser.parse_args()
     
-    reader = SerialReader(port=args.port, baudrate=args.baudrate)
+    # Treat termination (cancellation from the API) like Ctrl+C so partial data is discarded
+    signal.signal(signal.SIGTERM, handle_termination)
+    
+    reader = SerialReader(port=args.port, baudrate=args.baudrate, progress_format=args.progress)
     
     success = reader.calibrate_posture(args.mode, args.samples, args.user_id)
     
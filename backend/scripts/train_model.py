@@ -12,50 +12,123 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+import shutil
+import time
 import argparse
+from collections import OrderedDict
 from datetime import datetime
 import json
+import uuid
 
 class PostureModelTrainer:
-    def __init__(self, user_id):
+    def __init__(self, user_id, max_samples=5000, dedup_scale=1.0, dedup_window=10000, chunk_size=10000):
         self.user_id = user_id
         self.model = None
         self.scaler = None
         self.feature_columns = ['ax', 'ay', 'az', 'gx', 'gy', 'gz']
         
+        # Preprocessing: near-duplicate removal and per-class sample budget
+        self.max_samples = max_samples
+        self.dedup_scale = dedup_scale  # Quantization step as a fraction of each feature's std (0 disables)
+        self.dedup_window = dedup_window  # Most recent keys remembered for duplicate detection
+        self.chunk_size = chunk_size
+        self.data_stats = {}
+        self.training_time = None
+        self.inference_latency_ms = None
+        
     def load_calibration_data(self):
-        """Load calibration data for the user"""
+        """Stream calibration data, drop near-duplicates and sample each class up to its budget"""
         data_dir = 'data'
-        good_file = f'{data_dir}/good_posture_{self.user_id}.csv'
-        bad_file = f'{data_dir}/bad_posture_{self.user_id}.csv'
-        
-        datasets = []
-        
-        # Load good posture data
-        if os.path.exists(good_file):
-            good_data = pd.read_csv(good_file)
-            print(f"Loaded {len(good_data)} good posture samples")
-            datasets.append(good_data)
-        else:
-            print(f"Warning: Good posture data not found at {good_file}")
-        
-        # Load bad posture data
-        if os.path.exists(bad_file):
-            bad_data = pd.read_csv(bad_file)
-            print(f"Loaded {len(bad_data)} bad posture samples")
-            datasets.append(bad_data)
-        else:
-            print(f"Warning: Bad posture data not found at {bad_file}")
-        
-        if not datasets:
+        files = {
+            'good': f'{data_dir}/good_posture_{self.user_id}.csv',
+            'bad': f'{data_dir}/bad_posture_{self.user_id}.csv'
+        }
+        
+        available = {label: filename for label, filename in files.items() if os.path.exists(filename)}
+        for label, filename in files.items():
+            if label not in available:
+                print(f"Warning: {label.capitalize()} posture data not found at {filename}")
+        
+        if not available:
             raise FileNotFoundError("No calibration data found. Please run calibration first.")
         
-        # Combine datasets
-        combined_data = pd.concat(datasets, ignore_index=True)
+        # Split the budget evenly so neither posture dominates training
+        budget_per_class = self.max_samples // len(available) if self.max_samples else None
+        rng = np.random.default_rng(42)
+        reservoirs = {}
+        
+        for label, filename in available.items():
+            reservoir = []
+            total_rows = 0
+            unique_rows = 0
+            steps = None
+            # Near-duplicates are consecutive readings while the user holds still, so
+            # only recent keys are kept (LRU) instead of every key in the file
+            recent_keys = OrderedDict()
+            
+            for chunk in pd.read_csv(filename, usecols=self.feature_columns + ['label'], chunksize=self.chunk_size):
+                chunk = chunk.dropna()
+                total_rows += len(chunk)
+                rows = chunk[self.feature_columns].to_numpy(dtype=np.float64)
+                labels = chunk['label'].to_numpy()
+                if steps is None and len(rows):
+                    steps = self.dedup_steps(rows)
+                
+                for row, row_label, key in zip(rows, labels, self.dedup_keys(rows, steps)):
+                    if key is not None:
+                        key = (row_label, key)
+                        if key in recent_keys:
+                            recent_keys.move_to_end(key)
+                            continue
+                        recent_keys[key] = None
+                        if len(recent_keys) > self.dedup_window:
+                            recent_keys.popitem(last=False)
+                    
+                    unique_rows += 1
+                    sample = (row, row_label)
+                    
+                    # Reservoir sampling keeps a uniform sample without holding every row
+                    if budget_per_class is None or len(reservoir) < budget_per_class:
+                        reservoir.append(sample)
+                    else:
+                        slot = rng.integers(0, unique_rows)
+                        if slot < budget_per_class:
+                            reservoir[slot] = sample
+            
+            reservoirs[label] = reservoir
+            self.data_stats[label] = {
+                'rows': total_rows,
+                'unique_rows': unique_rows,
+                'sampled_rows': len(reservoir)
+            }
+            print(f"Loaded {total_rows} {label} posture samples "
+                  f"({total_rows - unique_rows} near-duplicates removed, {len(reservoir)} kept)")
+        
+        samples = [sample for reservoir in reservoirs.values() for sample in reservoir]
+        combined_data = pd.DataFrame([row for row, _ in samples], columns=self.feature_columns)
+        combined_data['label'] = [row_label for _, row_label in samples]
         print(f"Total samples: {len(combined_data)}")
         
         return combined_data
     
+    def dedup_steps(self, rows):
+        """Per-feature quantization steps, scaled to each feature's spread in the first chunk"""
+        if not self.dedup_scale:
+            return None
+        
+        # Accelerometer and gyroscope axes have very different ranges, so one
+        # absolute step would be too coarse for some and too fine for others
+        spread = rows.std(axis=0)
+        return np.where(spread > 0, spread, 1.0) * self.dedup_scale
+    
+    def dedup_keys(self, rows, steps):
+        """Hash keys of quantized feature vectors (None for every row when dedup is disabled)"""
+        if steps is None:
+            return [None] * len(rows)
+        
+        quantized = np.round(rows / steps).astype(np.int64)
+        return [row.tobytes() for row in quantized]
+    
     def preprocess_data(self, data):
         """Preprocess the data for training"""
         # Extract features and labels
@@ -87,7 +160,9 @@ class PostureModelTrainer:
         )
         
         print("Training model...")
+        started_at = time.perf_counter()
         self.model.fit(X_train, y_train)
+        self.training_time = time.perf_counter() - started_at
         
         # Evaluate model
         y_pred = self.model.predict(X_test)
@@ -97,15 +172,33 @@ class PostureModelTrainer:
         print("\nClassification Report:")
         print(classification_report(y_test, y_pred, target_names=['Good', 'Bad']))
         
+        self.inference_latency_ms = self.measure_inference_latency(X_test[:1])
+        print(f"Training time: {self.training_time:.2f}s, "
+              f"single-sample inference: {self.inference_latency_ms:.2f}ms")
+        
         return accuracy
     
+    def measure_inference_latency(self, sample, repeats=20):
+        """Median latency in milliseconds of a single-sample prediction, as the live loop makes"""
+        timings = []
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            self.model.predict_proba(sample)
+            timings.append(time.perf_counter() - started_at)
+        return float(np.median(timings) * 1000)
+    
     def save_model(self, accuracy):
-        """Save the trained model and scaler"""
+        """Save the trained model and scaler as a new version and make it the active one"""
         models_dir = 'models'
         os.makedirs(models_dir, exist_ok=True)
         
-        model_filename = f'{models_dir}/posture_model_{self.user_id}.joblib'
-        scaler_filename = f'{models_dir}/scaler_{self.user_id}.joblib'
+        created_at = datetime.now()
+        # The random suffix keeps versions from trainings in the same second apart
+        version = f"{created_at.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        
+        # Versioned artifacts stay on disk so older versions can be reactivated later
+        model_filename = f'{models_dir}/posture_model_{self.user_id}_{version}.joblib'
+        scaler_filename = f'{models_dir}/scaler_{self.user_id}_{version}.joblib'
         
         # Save model and scaler
         joblib.dump(self.model, model_filename)
@@ -114,16 +207,28 @@ class PostureModelTrainer:
         # Save model metadata
         metadata = {
             'user_id': self.user_id,
+            'version': version,
             'accuracy': accuracy,
-            'created_at': datetime.now().isoformat(),
+            'created_at': created_at.isoformat(),
             'feature_columns': self.feature_columns,
-            'model_type': 'RandomForestClassifier'
+            'model_type': 'RandomForestClassifier',
+            'model_file': model_filename,
+            'scaler_file': scaler_filename,
+            'size_bytes': os.path.getsize(model_filename) + os.path.getsize(scaler_filename),
+            'training_time_s': self.training_time,
+            'inference_latency_ms': self.inference_latency_ms,
+            'training_data': self.data_stats
         }
         
-        metadata_filename = f'{models_dir}/model_metadata_{self.user_id}.json'
+        metadata_filename = f'{models_dir}/model_metadata_{self.user_id}_{version}.json'
         with open(metadata_filename, 'w') as f:
             json.dump(metadata, f, indent=2)
         
+        # The unversioned files are what predict_live.py loads
+        shutil.copyfile(model_filename, f'{models_dir}/posture_model_{self.user_id}.joblib')
+        shutil.copyfile(scaler_filename, f'{models_dir}/scaler_{self.user_id}.joblib')
+        shutil.copyfile(metadata_filename, f'{models_dir}/model_metadata_{self.user_id}.json')
+        
         print(f"Model saved to {model_filename}")
         print(f"Scaler saved to {scaler_filename}")
         print(f"Metadata saved to {metadata_filename}")
@@ -133,11 +238,26 @@ class PostureModelTrainer:
 def main():
     parser = argparse.ArgumentParser(description='Train SpineGuard Posture Model')
     parser.add_argument('--user_id', required=True, help='User ID for model training')
+    parser.add_argument('--max_samples', type=int, default=5000,
+                        help='Maximum training samples, split evenly across postures; 0 keeps all (default: 5000)')
+    parser.add_argument('--dedup_scale', type=float, default=1.0,
+                        help='Near-duplicate quantization step as a fraction of each feature\'s '
+                             'standard deviation; 0 disables (default: 1.0)')
+    parser.add_argument('--dedup_window', type=int, default=10000,
+                        help='Recent rows remembered for near-duplicate removal (default: 10000)')
+    parser.add_argument('--chunk_size', type=int, default=10000,
+                        help='Rows read per chunk from calibration files (default: 10000)')
     
     args = parser.parse_args()
     
     try:
-        trainer = PostureModelTrainer(args.user_id)
+        trainer = PostureModelTrainer(
+            args.user_id,
+            max_samples=args.max_samples,
+            dedup_scale=args.dedup_scale,
+            dedup_window=args.dedup_window,
+            chunk_size=args.chunk_size
+        )
         
         # Load and preprocess data
         print("Loading calibration data...")
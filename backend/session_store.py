@@ -0,0 +1,137 @@
+"""
+Shared session state for SpineGuard
+Keeps monitoring and calibration sessions (owner worker, progress) somewhere
+every worker can see them, so app.py can run behind several gunicorn workers.
+"""
+
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import copy
+import threading
+
+SESSION_TTL = 30  # Seconds an owner may go without refreshing before its session expires
+
+class LocalSessionStore:
+    """In-process store, correct only when a single worker serves the API"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        session = self.sessions.get(key)
+        if session and session['expires_at'] <= datetime.utcnow():
+            del self.sessions[key]
+            return None
+        if not session or not session['active']:
+            return None
+        return session
+
+    def _sweep(self):
+        """Drop expired sessions, as the TTL index does for MongoSessionStore"""
+        now = datetime.utcnow()
+        expired = [key for key, session in self.sessions.items() if session['expires_at'] <= now]
+        for key in expired:
+            del self.sessions[key]
+
+    def get(self, key):
+        """Current session, or None if there is no live one"""
+        with self.lock:
+            return copy.deepcopy(self._live(key))
+
+    def claim(self, key, owner, fields, ttl=SESSION_TTL):
+        """Make owner the session holder unless another live owner has it"""
+        with self.lock:
+            # Finished calibration sessions are never released, only left to expire
+            self._sweep()
+            if self._live(key):
+                return False
+            self.sessions[key] = dict(
+                fields, active=True, owner=owner, stop_requested=False,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            )
+            return True
+
+    def update(self, key, owner, fields=None, ttl=SESSION_TTL):
+        """Update the owner's session and extend its expiry, returning the session or None if lost"""
+        with self.lock:
+            session = self._live(key)
+            if not session or session['owner'] != owner:
+                return None
+            session.update(fields or {})
+            session['expires_at'] = datetime.utcnow() + timedelta(seconds=ttl)
+            return copy.deepcopy(session)
+
+    def request_stop(self, key):
+        """Ask whichever worker owns the session to stop it"""
+        with self.lock:
+            session = self._live(key)
+            if session:
+                session['stop_requested'] = True
+            return session is not None
+
+    def release(self, key, owner):
+        """End the session if owner still holds it"""
+        with self.lock:
+            session = self.sessions.get(key)
+            if session and session['owner'] == owner:
+                del self.sessions[key]
+
+class MongoSessionStore:
+    """Store backed by a Mongo collection with a TTL index, shared by all workers"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        # Mongo removes sessions whose owner stopped refreshing them
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+
+    def _live_filter(self, key):
+        return {'_id': key, 'active': True, 'expires_at': {'$gt': datetime.utcnow()}}
+
+    def get(self, key):
+        """Current session, or None if there is no live one"""
+        return self.collection.find_one(self._live_filter(key))
+
+    def claim(self, key, owner, fields, ttl=SESSION_TTL):
+        """Make owner the session holder unless another live owner has it"""
+        now = datetime.utcnow()
+        try:
+            # The upsert inserts a second document with the same _id if a live
+            # session exists, which Mongo rejects, so only one claim can win
+            self.collection.find_one_and_update(
+                {'_id': key, '$or': [{'active': False}, {'expires_at': {'$lte': now}}]},
+                {'$set': dict(
+                    fields, active=True, owner=owner, stop_requested=False,
+                    expires_at=now + timedelta(seconds=ttl)
+                )},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def update(self, key, owner, fields=None, ttl=SESSION_TTL):
+        """Update the owner's session and extend its expiry, returning the session or None if lost"""
+        return self.collection.find_one_and_update(
+            dict(self._live_filter(key), owner=owner),
+            {'$set': dict(fields or {}, expires_at=datetime.utcnow() + timedelta(seconds=ttl))},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def request_stop(self, key):
+        """Ask whichever worker owns the session to stop it"""
+        result = self.collection.update_one(self._live_filter(key), {'$set': {'stop_requested': True}})
+        return result.matched_count > 0
+
+    def release(self, key, owner):
+        """End the session if owner still holds it"""
+        self.collection.delete_one({'_id': key, 'owner': owner})
+
+def create_session_store(backend, db=None):
+    """Build the store named by backend ('local' or 'mongo')"""
+    if backend == 'local':
+        return LocalSessionStore()
+    if backend == 'mongo':
+        return MongoSessionStore(db.sessions)
+    raise ValueError(f"Unknown session store: {backend}")
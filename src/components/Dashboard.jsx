@@ -40,6 +40,7 @@ const Dashboard = () => {
   const [error, setError] = useState(null)
   const [userSettings, setUserSettings] = useState(null)
   const [userModels, setUserModels] = useState([])
+  const [calibrationSession, setCalibrationSession] = useState(null)
 
   // Redirect if not logged in
   useEffect(() => {
@@ -128,13 +129,16 @@ const Dashboard = () => {
     setError(null)
     
     try {
-      await ApiService.calibrateGoodPosture(user.id, 200)
+      const session = await ApiService.calibrateGoodPosture(user.id, 200)
+      setCalibrationSession(session)
+      await ApiService.waitForCalibration(session.session_id, setCalibrationSession)
       setError(null)
       // Show success message
       console.log('Good posture calibration completed')
     } catch (err) {
       setError(err.message || 'Calibration failed')
     } finally {
+      setCalibrationSession(null)
       setIsLoading(false)
     }
   }
@@ -146,17 +150,30 @@ const Dashboard = () => {
     setError(null)
     
     try {
-      await ApiService.calibrateBadPosture(user.id, 200)
+      const session = await ApiService.calibrateBadPosture(user.id, 200)
+      setCalibrationSession(session)
+      await ApiService.waitForCalibration(session.session_id, setCalibrationSession)
       setError(null)
       // Show success message
       console.log('Bad posture calibration completed')
     } catch (err) {
       setError(err.message || 'Calibration failed')
     } finally {
+      setCalibrationSession(null)
       setIsLoading(false)
     }
   }
 
+  const cancelCalibration = async () => {
+    if (!calibrationSession) return
+
+    try {
+      await ApiService.cancelCalibration(calibrationSession.session_id)
+    } catch (err) {
+      setError(err.message || 'Failed to cancel calibration')
+    }
+  }
+
   const handleLogout = () => {
     logout()
     navigate('/login')
@@ -396,6 +413,30 @@ const Dashboard = () => {
                   Settings
                 </motion.button>
               </div>
+
+              {calibrationSession && (
+                <div className="mt-4 space-y-2">
+                  <div className="flex items-center justify-between text-sm">
+                    <span className="text-spine-gray">
+                      {calibrationSession.status === 'countdown'
+                        ? calibrationSession.message
+                        : `${calibrationSession.collected}/${calibrationSession.target} samples · ${calibrationSession.rate} Hz · ${calibrationSession.dropped} dropped`}
+                    </span>
+                    <button
+                      onClick={cancelCalibration}
+                      className="text-spine-red hover:underline"
+                    >
+                      Cancel
+                    </button>
+                  </div>
+                  <div className="w-full h-2 rounded-full bg-white/10">
+                    <div
+                      className="h-2 rounded-full bg-spine-blue transition-all"
+                      style={{ width: `${calibrationSession.progress}%` }}
+                    />
+                  </div>
+                </div>
+              )}
             </motion.div>
           </div>
         </main>
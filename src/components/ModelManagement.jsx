@@ -17,6 +17,7 @@ import ApiService from '../services/api'
 const ModelManagement = () => {
   const { user } = useUser()
   const [models, setModels] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [isUploading, setIsUploading] = useState(false)
   const [isTraining, setIsTraining] = useState(false)
   const [error, setError] = useState(null)
@@ -32,8 +33,22 @@ const ModelManagement = () => {
     if (!user) return
     
     try {
-      const userModels = await ApiService.getUserModels(user.id)
-      setModels(userModels)
+      const page = await ApiService.getUserModelsPage(user.id)
+      setModels(page.models)
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      console.error('Failed to load models:', err)
+      setError('Failed to load models')
+    }
+  }
+
+  const loadMoreModels = async () => {
+    if (!user || !nextCursor) return
+    
+    try {
+      const page = await ApiService.getUserModelsPage(user.id, { cursor: nextCursor })
+      setModels(current => [...current, ...page.models])
+      setNextCursor(page.next_cursor)
     } catch (err) {
       console.error('Failed to load models:', err)
       setError('Failed to load models')
@@ -87,6 +102,18 @@ const ModelManagement = () => {
     }
   }
 
+  const rollbackModel = async () => {
+    if (!user) return
+    
+    try {
+      await ApiService.rollbackModel(user.id)
+      // Reload models to get updated status
+      await loadModels()
+    } catch (err) {
+      setError(err.message || 'Failed to roll back model')
+    }
+  }
+
   const deleteModel = async (modelId) => {
     if (!user) return
     
@@ -224,6 +251,9 @@ const ModelManagement = () => {
                     <div className="flex items-center space-x-4 text-xs text-spine-gray">
                       <span>{model.accuracy}% accuracy</span>
                       <span>{model.size || 'Unknown size'}</span>
+                      {model.inference_latency_ms != null && (
+                        <span>{model.inference_latency_ms.toFixed(1)} ms</span>
+                      )}
                       <span>{model.created_at}</span>
                     </div>
                   </div>
@@ -241,19 +271,39 @@ const ModelManagement = () => {
                     </motion.button>
                   )}
                   
-                  <motion.button
-                    whileHover={{ scale: 1.1 }}
-                    whileTap={{ scale: 0.9 }}
-                    onClick={() => deleteModel(model.id)}
-                    className="p-2 rounded-lg bg-red-500/20 text-red-400 hover:bg-red-500/30 transition-colors"
-                  >
-                    <Trash2 className="w-4 h-4" />
-                  </motion.button>
+                  {!model.is_active && (
+                    <motion.button
+                      whileHover={{ scale: 1.1 }}
+                      whileTap={{ scale: 0.9 }}
+                      onClick={() => deleteModel(model.id)}
+                      className="p-2 rounded-lg bg-red-500/20 text-red-400 hover:bg-red-500/30 transition-colors"
+                    >
+                      <Trash2 className="w-4 h-4" />
+                    </motion.button>
+                  )}
                 </div>
               </div>
             </motion.div>
           ))}
         </div>
+        <div className="flex items-center justify-between">
+          {nextCursor && (
+            <button
+              onClick={loadMoreModels}
+              className="text-sm text-spine-blue hover:underline"
+            >
+              Load more
+            </button>
+          )}
+          {models.find(m => m.is_active) && (
+            <button
+              onClick={rollbackModel}
+              className="text-sm text-spine-gray hover:underline ml-auto"
+            >
+              Roll back to previous version
+            </button>
+          )}
+        </div>
       </div>
 
       {/* Model Statistics */}
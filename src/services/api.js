@@ -95,6 +95,45 @@ class ApiService {
     });
   }
 
+  async getCalibrationSession(sessionId) {
+    return await this.makeRequest(`/calibrate/sessions/${sessionId}`);
+  }
+
+  async cancelCalibration(sessionId) {
+    return await this.makeRequest(`/calibrate/sessions/${sessionId}/cancel`, {
+      method: 'POST',
+    });
+  }
+
+  // Resolves when the calibration session completes, calling onProgress with each update
+  async waitForCalibration(sessionId, onProgress = () => {}) {
+    // EventSource cannot send headers, so the stream takes a short-lived token scoped to this session
+    const { stream_token: streamToken } = await this.getCalibrationSession(sessionId);
+
+    return new Promise((resolve, reject) => {
+      const url = `${API_BASE_URL}/calibrate/sessions/${sessionId}/stream?stream_token=${encodeURIComponent(streamToken)}`;
+      const source = new EventSource(url);
+
+      source.onmessage = (event) => {
+        const session = JSON.parse(event.data);
+        onProgress(session);
+
+        if (!session.finished_at) return;
+        source.close();
+        if (session.status === 'completed') {
+          resolve(session);
+        } else {
+          reject(new Error(session.error || `Calibration ${session.status}`));
+        }
+      };
+
+      source.onerror = () => {
+        source.close();
+        reject(new Error('Lost connection to calibration progress stream'));
+      };
+    });
+  }
+
   // Monitoring
   async startMonitoring(userId) {
     return await this.makeRequest('/monitoring/start', {
@@ -114,20 +153,41 @@ class ApiService {
 
   // Models
   async getUserModels(userId) {
-    return await this.makeRequest(`/user/${userId}/models`);
+    const page = await this.getUserModelsPage(userId);
+    return page.models;
   }
 
-  // Placeholder methods for future implementation
-  async trainModel(userId) {
-    throw new Error('Model training is handled automatically during monitoring start');
+  async getUserModelsPage(userId, { limit, cursor, fields } = {}) {
+    const params = new URLSearchParams();
+    if (limit) params.set('limit', limit);
+    if (cursor) params.set('cursor', cursor);
+    if (fields) params.set('fields', fields.join(','));
+
+    const query = params.toString();
+    return await this.makeRequest(`/user/${userId}/models${query ? `?${query}` : ''}`);
   }
 
   async activateModel(modelId, userId) {
-    throw new Error('Model activation not implemented yet');
+    return await this.makeRequest(`/user/${userId}/models/${modelId}/activate`, {
+      method: 'POST',
+    });
+  }
+
+  async rollbackModel(userId) {
+    return await this.makeRequest(`/user/${userId}/models/rollback`, {
+      method: 'POST',
+    });
   }
 
   async deleteModel(modelId, userId) {
-    throw new Error('Model deletion not implemented yet');
+    return await this.makeRequest(`/user/${userId}/models/${modelId}`, {
+      method: 'DELETE',
+    });
+  }
+
+  // Placeholder methods for future implementation
+  async trainModel(userId) {
+    throw new Error('Model training is handled automatically during monitoring start');
   }
 
   async getUserProfile(userId) {